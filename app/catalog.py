@@ -0,0 +1,415 @@
+"""Incremental translation of gettext .po and JSON locale catalogs."""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .translator import TranslationService
+
+
+# printf 风格（转换符后不能紧跟字母，避免把 "100% complete" 当成占位符）、
+# {name}/{0}/{{name}}、${name} 占位符以及 HTML/XML 标签
+PLACEHOLDER_RE = re.compile(
+    r"%(?:\d+\$)?(?:\([^)]+\))?[-#0+]*\d*(?:\.\d+)?[sdifFeEgGxXocru%](?![A-Za-z])"
+    r"|\{\{\s*[\w.]+\s*\}\}|\$\{[\w.]+\}|\{(?:[A-Za-z_][\w.]*|\d+)(?::[^{}\s]*)?\}"
+    r"|</?[A-Za-z][^<>]*>"
+)
+
+# ICU MessageFormat：{count, plural, one {# item} other {# items}}
+ICU_HEAD_RE = re.compile(r"\{\s*[A-Za-z_]\w*\s*,\s*(?:plural|selectordinal|select)\s*,(?:\s*offset:\s*\d+)?")
+ICU_CASE_RE = re.compile(r"\s*(?:=\d+|[A-Za-z_]\w*)\s*\{")
+
+
+def _icu_spans(text: str) -> List[Tuple[int, int]]:
+    """Spans of ICU plural/select syntax, leaving the words in each case translatable.
+
+    Returns no spans if the message is not well-formed ICU.
+    """
+    spans: List[Tuple[int, int]] = []
+    # 栈中 "icu" 表示在选择器内等待分支，"case" 表示在某个分支的文本内
+    stack: List[str] = []
+    i = 0
+    while i < len(text):
+        head = ICU_HEAD_RE.match(text, i) if not stack or stack[-1] == "case" else None
+        if head:
+            spans.append(head.span())
+            stack.append("icu")
+            i = head.end()
+            continue
+        if stack and stack[-1] == "icu":
+            case = ICU_CASE_RE.match(text, i)
+            if case:
+                spans.append(case.span())
+                stack.append("case")
+                i = case.end()
+            elif text[i] == "}":
+                spans.append((i, i + 1))
+                stack.pop()
+                i += 1
+            elif text[i].isspace():
+                i += 1
+            else:
+                return []
+            continue
+        placeholder = PLACEHOLDER_RE.match(text, i) if text[i] == "{" else None
+        if placeholder:
+            # 分支文本里的 {name} 之后按普通占位符处理
+            i = placeholder.end()
+            continue
+        if stack and text[i] in "}#":
+            spans.append((i, i + 1))
+            if text[i] == "}":
+                stack.pop()
+        i += 1
+    if stack:
+        return []
+
+    # 相邻的语法片段合并为一个占位符
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def mask_placeholders(text: str) -> Tuple[str, List[str]]:
+    """Replace placeholders with numbered tokens the model must keep as-is."""
+    tokens: List[str] = []
+
+    def token(value: str) -> str:
+        tokens.append(value)
+        return f"⟦{len(tokens) - 1}⟧"
+
+    parts: List[str] = []
+    pos = 0
+    for start, end in _icu_spans(text) if "{" in text else []:
+        parts.append(PLACEHOLDER_RE.sub(lambda m: token(m.group(0)), text[pos:start]))
+        parts.append(token(text[start:end]))
+        pos = end
+    parts.append(PLACEHOLDER_RE.sub(lambda m: token(m.group(0)), text[pos:]))
+    return "".join(parts), tokens
+
+
+def unmask_placeholders(text: str, tokens: List[str]) -> Optional[str]:
+    """Restore placeholders; returns None if the model dropped or invented any."""
+    found = re.findall(r"⟦(\d+)⟧", text)
+    if sorted(int(i) for i in found) != list(range(len(tokens))):
+        return None
+    return re.sub(r"⟦(\d+)⟧", lambda m: tokens[int(m.group(1))], text)
+
+
+def needs_translation(text: str) -> bool:
+    """False for strings made only of placeholders, digits and punctuation."""
+    return any(ch.isalpha() for ch in mask_placeholders(text)[0])
+
+
+def atomic_write(path: Path, content: str) -> None:
+    """Write content to path via a temporary file and rename."""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class Manifest:
+    """Content-hash record of translations already produced for a catalog."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._data: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:20]
+
+    def get(self, lang: str, text: str) -> Optional[str]:
+        return self._data.get(lang, {}).get(self.key(text))
+
+    def set(self, lang: str, text: str, translation: str) -> None:
+        self._data.setdefault(lang, {})[self.key(text)] = translation
+
+    def prune(self, lang: str, texts: List[str]) -> None:
+        """Drop entries for source strings no longer in the catalog."""
+        keep = {self.key(text) for text in texts}
+        entries = self._data.get(lang, {})
+        self._data[lang] = {k: v for k, v in entries.items() if k in keep}
+
+    def save(self) -> None:
+        atomic_write(self.path, json.dumps(self._data, ensure_ascii=False, indent=0, sort_keys=True))
+
+
+class JsonCatalog:
+    """Nested JSON object whose string leaves are translatable messages."""
+
+    suffix = ".json"
+
+    def __init__(self, path: Path):
+        with open(path, 'r', encoding='utf-8') as f:
+            self.data = json.load(f)
+
+    def strings(self) -> List[str]:
+        found: List[str] = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+            elif isinstance(node, str):
+                found.append(node)
+
+        walk(self.data)
+        return list(dict.fromkeys(found))
+
+    def render(self, translations: Dict[str, str], lang: str) -> str:
+        def walk(node):
+            if isinstance(node, dict):
+                return {key: walk(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [walk(value) for value in node]
+            if isinstance(node, str):
+                # 未翻译的条目保留原文，避免界面出现空字符串
+                return translations.get(node, node)
+            return node
+
+        return json.dumps(walk(self.data), ensure_ascii=False, indent=2) + "\n"
+
+
+# gettext Plural-Forms 表达式：(nplurals, plural, 单数 msgid 对应的 msgstr 下标)
+# 只有一种形式的语言使用复数原文的译文
+PLURAL_FORMS: Dict[str, Tuple[int, str, Optional[int]]] = {
+    "zh": (1, "0", None),
+    "ja": (1, "0", None),
+    "ko": (1, "0", None),
+    "en": (2, "(n != 1)", 0),
+    "de": (2, "(n != 1)", 0),
+    "nl": (2, "(n != 1)", 0),
+    "es": (2, "(n != 1)", 0),
+    "pt": (2, "(n != 1)", 0),
+    "fr": (2, "(n > 1)", 0),
+    "ru": (3, "(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2)", 0),
+    "pl": (3, "(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2)", 0),
+    "ar": (6, "(n==0 ? 0 : n==1 ? 1 : n==2 ? 2 : n%100>=3 && n%100<=10 ? 3 : n%100>=11 ? 4 : 5)", 1),
+}
+
+
+def plural_forms(lang: str) -> Optional[Tuple[int, str, Optional[int]]]:
+    """gettext plural rule for a language code such as `ru` or `zh-cn`, or None if unknown."""
+    code = lang.lower().replace("_", "-")
+    return PLURAL_FORMS.get(code) or PLURAL_FORMS.get(code.split("-")[0])
+
+
+def _po_unescape(value: str) -> str:
+    return re.sub(r'\\(.)', lambda m: {"n": "\n", "t": "\t", "r": "\r"}.get(m.group(1), m.group(1)), value)
+
+
+def _po_escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r"))
+
+
+def _po_field(name: str, value: str) -> List[str]:
+    if "\n" not in value.rstrip("\n"):
+        return [f'{name} "{_po_escape(value)}"']
+    lines = [f'{name} ""']
+    for part in value.splitlines(keepends=True):
+        lines.append(f'"{_po_escape(part)}"')
+    return lines
+
+
+class PoCatalog:
+    """Minimal gettext .po reader/writer (contexts, plurals and comments)."""
+
+    suffix = ".po"
+
+    def __init__(self, path: Path):
+        with open(path, 'r', encoding='utf-8') as f:
+            self.entries = self._parse(f.read())
+
+    @staticmethod
+    def _parse(content: str) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        entry: Dict[str, Any] = {"comments": [], "fields": {}}
+        current = None
+
+        def finish():
+            nonlocal entry, current
+            if entry["fields"] or entry["comments"]:
+                entries.append(entry)
+            entry = {"comments": [], "fields": {}}
+            current = None
+
+        for raw in content.splitlines():
+            line = raw.strip()
+            if not line:
+                finish()
+            elif line.startswith("#"):
+                if entry["fields"]:
+                    finish()
+                entry["comments"].append(raw)
+            elif line.startswith('"') and current:
+                entry["fields"][current] += _po_unescape(line[1:-1])
+            else:
+                name, _, value = line.partition(" ")
+                value = value.strip()
+                if name == "msgctxt" and "msgid" in entry["fields"]:
+                    finish()
+                current = name
+                entry["fields"][name] = _po_unescape(value[1:-1])
+        finish()
+        return entries
+
+    def strings(self) -> List[str]:
+        found: List[str] = []
+        for entry in self.entries:
+            fields = entry["fields"]
+            if fields.get("msgid"):
+                found.append(fields["msgid"])
+            if fields.get("msgid_plural"):
+                found.append(fields["msgid_plural"])
+        return list(dict.fromkeys(found))
+
+    def has_plurals(self) -> bool:
+        return any("msgid_plural" in entry["fields"] for entry in self.entries)
+
+    def render(self, translations: Dict[str, str], lang: str) -> str:
+        """Render the catalog for lang.
+
+        The header gets the target's Plural-Forms and every plural entry gets
+        one msgstr[n] per form. For languages without a known plural rule the
+        source header is kept and plural entries are left untranslated.
+        """
+        rule = plural_forms(lang)
+        blocks = []
+        for entry in self.entries:
+            fields = dict(entry["fields"])
+            msgid = fields.get("msgid")
+            if msgid == "":
+                # 头部条目：更新 Language 和 Plural-Forms 字段
+                header = self._set_header(fields.get("msgstr", ""), "Language", lang)
+                if rule:
+                    header = self._set_header(header, "Plural-Forms", f"nplurals={rule[0]}; plural={rule[1]};")
+                fields["msgstr"] = header
+            elif msgid is not None:
+                singular = translations.get(msgid, "")
+                if "msgid_plural" in fields:
+                    plural = translations.get(fields["msgid_plural"], "")
+                    counts = [k for k in fields if k.startswith("msgstr[")]
+                    for name in counts:
+                        del fields[name]
+                    if rule:
+                        nplurals, _, one = rule
+                        for n in range(nplurals):
+                            fields[f"msgstr[{n}]"] = singular if n == one else plural
+                    else:
+                        for name in counts:
+                            fields[name] = ""
+                else:
+                    fields["msgstr"] = singular
+
+            lines = list(entry["comments"])
+            for name, value in fields.items():
+                lines.extend(_po_field(name, value))
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks) + "\n"
+
+    @staticmethod
+    def _set_header(header: str, name: str, value: str) -> str:
+        pattern = rf"^{re.escape(name)}:.*$"
+        if re.search(pattern, header, flags=re.M):
+            return re.sub(pattern, lambda _: f"{name}: {value}", header, flags=re.M)
+        return header + f"{name}: {value}\n"
+
+
+def load_catalog(path: Path):
+    """Open a catalog by file extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".json":
+        return JsonCatalog(path)
+    if suffix in (".po", ".pot"):
+        return PoCatalog(path)
+    raise ValueError(f"Unsupported catalog format: {suffix}")
+
+
+def output_path(source: Path, lang: str, template: str = None) -> Path:
+    """Where the catalog for lang is written.
+
+    `en.json` becomes `ja.json`; other names get the language inserted
+    before the extension (`messages.po` -> `messages.ja.po`).
+    """
+    source = Path(source)
+    suffix = ".po" if source.suffix == ".pot" else source.suffix
+    if template:
+        return Path(template.format(lang=lang, stem=source.stem, suffix=suffix, dir=source.parent))
+    if re.fullmatch(r"[a-z]{2}(?:[-_][A-Za-z]{2,4})?", source.stem):
+        return source.with_name(f"{lang}{suffix}")
+    return source.with_name(f"{source.stem}.{lang}{suffix}")
+
+
+async def translate_catalog(
+    translator: TranslationService,
+    catalog,
+    targets: List[str],
+    manifest: Manifest,
+    source_lang: str = None
+) -> Dict[str, Dict[str, Any]]:
+    """Translate all catalog strings missing from the manifest, for every target.
+
+    Identical source strings are translated once; strings that are only
+    placeholders are copied. Returns per-language translations and counts.
+    """
+    texts = catalog.strings()
+
+    async def translate_one(lang: str) -> Dict[str, Any]:
+        translations: Dict[str, str] = {}
+        todo: List[str] = []
+        for text in texts:
+            if not needs_translation(text):
+                translations[text] = text
+            elif manifest.get(lang, text) is not None:
+                translations[text] = manifest.get(lang, text)
+            else:
+                todo.append(text)
+
+        reused = len(translations)
+        failed = 0
+        if todo:
+            masked = [mask_placeholders(text) for text in todo]
+            async for index, result in translator.translate_items(
+                [m[0] for m in masked], lang, source_lang=source_lang, notes=False
+            ):
+                restored = None if result.startswith("❌ Error") else unmask_placeholders(result, masked[index][1])
+                if restored is None:
+                    failed += 1
+                    continue
+                translations[todo[index]] = restored
+                manifest.set(lang, todo[index], restored)
+
+        manifest.prune(lang, texts)
+        return {
+            "translations": translations,
+            "translated": len(todo) - failed,
+            "reused": reused,
+            "failed": failed
+        }
+
+    results = await asyncio.gather(*(translate_one(lang) for lang in targets))
+    return dict(zip(targets, results))
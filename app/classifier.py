@@ -0,0 +1,80 @@
+"""Input text classification for lookup-cli."""
+
+import math
+import re
+import unicodedata
+from typing import List, Tuple
+
+
+# 不以空格分词的文字：汉字、平假名/片假名，以及泰文、老挝文、缅甸文、高棉文
+HAN = "\u3005\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f"
+KANA = "\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f"
+KATAKANA = "\u30a0-\u30ff\u31f0-\u31ff\uff66-\uff9f"
+SOUTHEAST_ASIAN = "\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff"
+# 组合附加符号（阿拉伯语、希伯来语的元音符号等）属于所在的单词
+MARKS = "\u0300-\u036f\u0483-\u0489\u0591-\u05c7\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed"
+
+_LETTER = rf"(?:(?![{HAN}{KANA}{SOUTHEAST_ASIAN}])[\w{MARKS}])"
+TOKEN_RE = re.compile(
+    rf"(?P<cjk>[{HAN}{KANA}]+)"
+    rf"|(?P<sea>[{SOUTHEAST_ASIAN}]+)"
+    rf"|(?P<word>{_LETTER}+(?:['’\-]{_LETTER}+)*)"
+)
+KANA_RE = re.compile(rf"[{KANA}]+")
+KATAKANA_RE = re.compile(rf"[{KATAKANA}]+")
+
+# 句末标点，包括全角和阿拉伯语问号
+SENTENCE_END = set(".!?\u3002\uff01\uff1f\uff61\uff0e\u2026\u203c\u2047\u2048\u2049\u061f")
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """Split text into (script kind, run) tokens: 'word', 'cjk' or 'sea'."""
+    return [(match.lastgroup, match.group()) for match in TOKEN_RE.finditer(text)]
+
+
+def _units(kind: str, run: str) -> int:
+    """Approximate number of words in a token."""
+    if kind == "word":
+        return 1
+    if kind == "sea":
+        return math.ceil(len(run) / 4)
+    # 片假名外来语较长，汉字/平假名平均约两个字符一个词
+    if KATAKANA_RE.fullmatch(run):
+        return math.ceil(len(run) / 4)
+    return math.ceil(len(run) / 2)
+
+
+def _is_single_word(kind: str, run: str) -> bool:
+    if kind == "word":
+        return any(ch.isalpha() for ch in run)
+    if kind == "sea":
+        return len(run) <= 8
+    if KATAKANA_RE.fullmatch(run):
+        return len(run) <= 10
+    if KANA_RE.fullmatch(run):
+        return len(run) <= 6
+    return len(run) <= 4
+
+
+def classify_text(text: str) -> str:
+    """Classify text as word, phrase, or sentence.
+
+    Text is segmented by script: space-separated scripts count one unit
+    per word, while Han, kana and Southeast Asian runs count roughly one
+    unit per 2–4 characters. Full-width sentence punctuation such as
+    '。' and '？' counts like its ASCII counterpart.
+    """
+    text = unicodedata.normalize("NFC", text.strip())
+    tokens = tokenize(text)
+    if not tokens:
+        return "phrase"
+
+    if len(tokens) == 1 and _is_single_word(*tokens[0]):
+        return "word"
+
+    units = sum(_units(kind, run) for kind, run in tokens)
+    if units > 5:
+        return "sentence"
+    if units >= 2 and any(ch in SENTENCE_END for ch in text):
+        return "sentence"
+    return "phrase"
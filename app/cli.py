@@ -1,10 +1,16 @@
 """Command-line interface for lookup-cli."""
 
 import asyncio
+import csv
+import json
+import os
 import sys
+import threading
+from contextlib import aclosing
+from datetime import datetime
 from pathlib import Path
 import click
-from rich.console import Console
+from rich.console import Console, Group
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
 from rich.text import Text
@@ -16,6 +22,16 @@ from langdetect import detect
 from .config import Config
 from .translator import TranslationService
 from .i18n import I18n
+from .preferences import TargetPreferences
+from .watch import WatchSession, Checkpoint
+from .pipeline import BulkPipeline
+from .history import HistoryStore, parse_since
+from .endpoints import EndpointPool, load_usage
+from .provider_stats import ProviderStats
+from .glossary import Glossary, fold, load_csv
+from .usage import TokenBudget, UsageStore, start_of_day
+from .live import LiveLookup
+from .catalog import Manifest, PoCatalog, atomic_write, load_catalog, output_path, plural_forms, translate_catalog
 
 
 console = Console()
@@ -59,10 +75,12 @@ def validate_language(lang_code, i18n=None):
 @click.group(invoke_without_command=True)
 @click.option('--target', '-t', help='Target language code')
 @click.option('--support', '-s', is_flag=True, help='Show supported languages')
+@click.option('--tm-only', is_flag=True, help='Only use similar past translations, never call the API')
+@click.option('--timings', is_flag=True, help='Show the route used and request timings')
 @click.option('--help', '-h', is_flag=True, expose_value=False, is_eager=True, help='Show this message and exit.')
 @click.argument('text', nargs=-1)
 @click.pass_context
-def cli(ctx, target, support, text):
+def cli(ctx, target, support, tm_only, timings, text):
     """Lu - A powerful command-line translation tool with AI support."""
     
     # 显示支持的语言
@@ -79,7 +97,7 @@ def cli(ctx, target, support, text):
         if text:
             # 如果提供了文本且没有子命令，执行翻译
             text_to_translate = ' '.join(text)
-            translate_text_smart(text_to_translate, target, i18n)
+            translate_text_smart(text_to_translate, target, i18n, tm_only=tm_only, timings=timings)
         else:
             # 如果没有文本和子命令，显示帮助
             click.echo(ctx.get_help())
@@ -100,7 +118,7 @@ def show_supported_languages():
     console.print(f"[yellow]{i18n.t('usage')}:[/yellow] [bold]lu trans Hello world[/bold]")
 
 
-def translate_text_smart(text_to_translate, target_lang, i18n):
+def translate_text_smart(text_to_translate, target_lang, i18n, tm_only=False, timings=False):
     """智能翻译函数，根据主语言自动选择目标语言"""
     config = Config()
     primary_lang = config.get("primary_language", "zh-cn")
@@ -110,19 +128,19 @@ def translate_text_smart(text_to_translate, target_lang, i18n):
         console.print(i18n.t("config_not_found"), style="yellow")
         return
     
-    # 检查API密钥是否配置
-    model_config = config.get_current_model_config()
-    if not model_config.get('api_key'):
+    # 检查API密钥是否配置（仅使用翻译记忆时不需要）
+    if not tm_only and not config.is_ready():
         console.print(i18n.t("api_key_not_configured"), style="yellow")
         return
     
     # 如果没有指定目标语言，智能判断
+    needs_selection = False
     if not target_lang:
         try:
             detected_lang = detect(text_to_translate)
             # 如果检测到的语言是主语言，需要交互式选择目标语言
             if detected_lang == primary_lang or detected_lang.startswith(primary_lang.split('-')[0]):
-                target_lang = interactive_select_target_language(i18n, primary_lang)
+                needs_selection = True
             else:
                 # 非主语言翻译为主语言
                 target_lang = primary_lang
@@ -133,8 +151,27 @@ def translate_text_smart(text_to_translate, target_lang, i18n):
     # 创建翻译服务
     translator = TranslationService(config)
     
+    if needs_selection:
+        preferences = TargetPreferences(config.config_dir / "target_history.json", primary_lang)
+        choices = [code for code in SUPPORTED_LANGUAGES if code != primary_lang]
+        
+        # 几乎每次都选同一个目标语言时直接跳过选择
+        if config.get("target_selection.auto_skip", True):
+            target_lang = preferences.dominant(choices)
+        if target_lang:
+            console.print(i18n.t("auto_selected_target", target=target_lang), style="dim")
+        elif tm_only or not config.get("target_selection.speculative", True):
+            target_lang = interactive_select_target_language(i18n, primary_lang)
+            preferences.record(target_lang)
+        else:
+            guess = preferences.most_likely(choices, config.get("default_target_language", "en"))
+            asyncio.run(_translate_with_speculation(translator, text_to_translate, guess, preferences, i18n,
+                                                    primary_lang, timings=timings))
+            return
+    
     # 运行翻译
-    asyncio.run(_translate_async_smart(translator, text_to_translate, target_lang, i18n))
+    asyncio.run(_translate_async_smart(translator, text_to_translate, target_lang, i18n,
+                                       tm_only=tm_only, timings=timings))
 
 
 def interactive_select_target_language(i18n, primary_lang):
@@ -161,7 +198,94 @@ def interactive_select_target_language(i18n, primary_lang):
             console.print("❌ 无效选择，请重试" if primary_lang.startswith('zh') else "❌ Invalid choice, please try again")
 
 
-async def _translate_async_smart(translator: TranslationService, text: str, target_lang: str, i18n):
+def _run_in_daemon_thread(func, *args) -> asyncio.Future:
+    """在守护线程中运行阻塞函数（如交互输入），Ctrl-C 时不会阻塞退出"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def settle(setter, value):
+        if not future.done():
+            setter(value)
+    
+    def runner():
+        try:
+            result = func(*args)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, result)
+    
+    threading.Thread(target=runner, daemon=True).start()
+    return future
+
+
+async def _translate_with_speculation(translator: TranslationService, text: str, guess: str,
+                                      preferences: TargetPreferences, i18n, primary_lang: str,
+                                      timings: bool = False):
+    """在用户选择目标语言的同时，预先向最可能的目标语言发起翻译"""
+    chunks: asyncio.Queue = asyncio.Queue()
+    results = []
+    
+    async def speculate():
+        # 猜测的结果先不写入历史和翻译记忆，确认猜对后再保存
+        translator.last_result = None
+        try:
+            async with aclosing(translator.translate_sections(text, guess, persist=False)) as stream:
+                async for item in stream:
+                    chunks.put_nowait(item)
+        finally:
+            results.append(translator.last_result)
+            chunks.put_nowait(None)
+    
+    task = asyncio.create_task(speculate())
+    try:
+        target_lang = await _run_in_daemon_thread(interactive_select_target_language, i18n, primary_lang)
+    except BaseException:
+        task.cancel()
+        raise
+    preferences.record(target_lang)
+    
+    # 猜错了：取消预先发起的请求，重新翻译
+    if target_lang != guess:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await _translate_async_smart(translator, text, target_lang, i18n, timings=timings)
+        return
+    
+    async def buffered():
+        while True:
+            item = await chunks.get()
+            if item is None:
+                return
+            # 一次性取出已缓冲的内容（按区块合并），立即展示
+            merged = {item[0]: item[1]}
+            finished = False
+            while not chunks.empty():
+                item = chunks.get_nowait()
+                if item is None:
+                    finished = True
+                    break
+                merged[item[0]] = merged.get(item[0], "") + item[1]
+            for section, chunk in merged.items():
+                yield section, chunk
+            if finished:
+                return
+    
+    try:
+        await _translate_async_smart(translator, text, target_lang, i18n, stream=buffered(), timings=timings)
+    finally:
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if results and results[0]:
+            translator.save_result(results[0])
+
+
+async def _translate_async_smart(translator: TranslationService, text: str, target_lang: str, i18n,
+                                tm_only: bool = False, stream=None, timings: bool = False):
     """Async translation with streaming output and i18n support."""
     
     console.print(f"\n[bold blue]{i18n.t('translating')}:[/bold blue] {text}")
@@ -169,29 +293,75 @@ async def _translate_async_smart(translator: TranslationService, text: str, targ
         console.print(f"[bold green]{i18n.t('target')}:[/bold green] {target_lang}")
     console.print()
     
+    # 先查翻译记忆，命中时立即展示相似的历史翻译
+    match = translator.lookup_memory(text, target_lang)
+    if match:
+        title = i18n.t("similar_translation", similarity=f"{match['similarity']:.0%}")
+        body = match["result"]
+        if match["source"] != text:
+            body = f"[dim]{match['source']}[/dim]\n\n{body}"
+        console.print(Panel(body, title=title, border_style="dim"))
+        console.print()
+    
+    if tm_only:
+        if not match:
+            console.print(i18n.t("tm_no_match"), style="yellow")
+        return
+    
     # Create a live display for streaming output
-    response_text = ""
+    # 句子的译文和语法分析并行生成，分别显示在两个面板中
+    sections = {}
+    
+    def render():
+        panels = [Panel(sections.get("translation", ""), title=i18n.t("translation_result"), border_style="blue")]
+        if "analysis" in sections:
+            panels.append(Panel(sections["analysis"], title=i18n.t("grammar_analysis"), border_style="cyan"))
+        return Group(*panels)
     
     with Live(console=console, refresh_per_second=10) as live:
         spinner = Spinner("dots", text=i18n.t("thinking"))
         live.update(spinner)
         
-        first_chunk = True
-        async for chunk in translator.translate_streaming(text, target_lang):
-            if first_chunk:
-                live.update(Panel("", title=i18n.t("translation_result"), border_style="blue"))
-                first_chunk = False
-            
-            response_text += chunk
-            live.update(Panel(response_text, title=i18n.t("translation_result"), border_style="blue"))
-    
+        if stream is None:
+            stream = translator.translate_sections(text, target_lang)
+        try:
+            async with aclosing(stream):
+                async for section, chunk in stream:
+                    sections[section] = sections.get(section, "") + chunk
+                    live.update(render())
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            # Ctrl-C：关闭上游请求（aclosing），保留已显示的部分结果并提示不完整
+            if sections:
+                live.update(render())
+            live.stop()
+            console.print(i18n.t("interrupted_incomplete"), style="yellow")
+            raise
+    
+    if translator.last_route.get("downgraded"):
+        console.print(i18n.t("usage_downgraded"), style="yellow")
+    if timings:
+        _print_timings(translator, i18n)
     console.print()
 
 
+def _print_timings(translator: TranslationService, i18n):
+    """显示本次请求使用的路由和耗时"""
+    route = translator.last_route
+    measured = translator.last_timings
+    console.print(
+        f"[dim]⏱ {i18n.t('route')} {route.get('name')} → {route.get('provider')}/{route.get('model')} "
+        f"({route.get('text_type')})"
+        f" · {i18n.t('first_token')} {measured.get('first_token', 0):.2f}s"
+        f" · {i18n.t('total_time')} {measured.get('total', 0):.2f}s[/dim]"
+    )
+
+
 @cli.command()
 @click.option('--target', '-t', help='Target language code')
+@click.option('--tm-only', is_flag=True, help='Only use similar past translations, never call the API')
+@click.option('--timings', is_flag=True, help='Show the route used and request timings')
 @click.argument('text', nargs=-1, required=False)
-def trans(target, text):
+def trans(target, tm_only, timings, text):
     """Translate text (all arguments after 'trans' are treated as one text block)."""
     # 如果没有提供文本，显示帮助
     if not text:
@@ -205,7 +375,435 @@ def trans(target, text):
     
     # 将所有参数合并为一个文本
     text_to_translate = ' '.join(text)
-    translate_text_smart(text_to_translate, target, i18n)
+    translate_text_smart(text_to_translate, target, i18n, tm_only=tm_only, timings=timings)
+
+
+@cli.command()
+@click.option('--target', '-t', help='Target language code')
+@click.option('--workers', '-w', type=int, help='Worker processes for detection/packing (auto for large lists)')
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+def batch(target, workers, file):
+    """Translate a word/phrase list (one item per line, '-' for stdin)."""
+    i18n = get_i18n()
+    validate_language(target, i18n)
+    
+    config = Config()
+    if not config.config_file.exists():
+        console.print(i18n.t("config_not_found"), style="yellow")
+        return
+    if not config.is_ready():
+        console.print(i18n.t("api_key_not_configured"), style="yellow")
+        return
+    
+    # 去掉空行和重复条目，保持原有顺序
+    items = list(dict.fromkeys(line.strip() for line in file if line.strip()))
+    if not items:
+        return
+    
+    primary_lang = config.get("primary_language", "zh-cn")
+    if not target:
+        try:
+            detected_lang = detect(" ".join(items[:20]))
+            is_primary = detected_lang == primary_lang or detected_lang.startswith(primary_lang.split('-')[0])
+        except:
+            is_primary = False
+        target = config.get("default_target_language", "en") if is_primary else primary_lang
+    
+    translator = TranslationService(config)
+    
+    # 条目很多时，语言检测、分类和打包放到多进程中执行
+    if workers is None and len(items) >= config.get("batch.process_pool_min_items", 5000):
+        workers = os.cpu_count() or 1
+    asyncio.run(_translate_batch(translator, items, target, i18n, workers))
+
+
+async def _translate_batch(translator: TranslationService, items, target_lang: str, i18n, workers=None):
+    """Stream packed list translations, printing each item as soon as it is parsed."""
+    console.print(f"[bold green]{i18n.t('target')}:[/bold green] {target_lang}")
+    console.print(i18n.t("batch_items", count=len(items)))
+    console.print()
+    
+    if workers:
+        results = BulkPipeline(translator, target_lang, workers=workers).run(items)
+    else:
+        results = translator.translate_items(items, target_lang)
+    async for index, result in results:
+        console.print(f"[cyan]{items[index]}[/cyan] → {result}")
+
+
+@cli.command()
+@click.option('--target', '-t', help='Target language code (defaults to your primary language)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Append translations to this file instead of stdout')
+@click.option('--window', default=0.5, show_default=True, help='Seconds to wait for more lines before sending a group')
+@click.option('--concurrency', default=2, show_default=True, help='Number of groups translated at the same time')
+@click.option('--retries', default=2, show_default=True, help='Times a failed line is retried before it is reported')
+@click.option('--from-start', is_flag=True, help='Translate existing content instead of only new lines')
+@click.argument('source')
+def watch(target, output, window, concurrency, retries, from_start, source):
+    """Follow a growing file (or '-' for stdin) and translate new lines."""
+    i18n = get_i18n()
+    validate_language(target, i18n)
+    
+    config = Config()
+    if not config.config_file.exists():
+        console.print(i18n.t("config_not_found"), style="yellow")
+        return
+    if not config.is_ready():
+        console.print(i18n.t("api_key_not_configured"), style="yellow")
+        return
+    
+    path = None if source == '-' else Path(source)
+    if path is not None and not path.is_file():
+        console.print(f"[red]{i18n.t('error')}[/red] {i18n.t('file_not_found')} {source}")
+        sys.exit(1)
+    
+    target = target or config.get("primary_language", "zh-cn")
+    translator = TranslationService(config)
+    sidecar = open(output, 'a', encoding='utf-8', buffering=1) if output else None
+    
+    def emit(line, translation):
+        if sidecar:
+            sidecar.write(translation + "\n")
+        else:
+            click.echo(translation)
+    
+    def on_error(line, error):
+        click.echo(i18n.t("watch_line_failed", line=line, error=error), err=True)
+    
+    session = WatchSession(
+        translator,
+        target,
+        emit,
+        on_error=on_error,
+        path=path,
+        checkpoint=Checkpoint(config.config_dir / "watch", path) if path else None,
+        window=window,
+        concurrency=max(1, concurrency),
+        from_start=from_start,
+        retries=max(0, retries)
+    )
+    try:
+        asyncio.run(session.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sidecar:
+            sidecar.close()
+
+
+@cli.command(name='live')
+@click.option('--target', '-t', help='Target language code (auto-selected per input if omitted)')
+@click.option('--delay', type=float, help='Seconds to wait after the last keystroke before translating')
+def live_lookup(target, delay):
+    """Translate as you type in a full-screen prompt."""
+    i18n = get_i18n()
+    validate_language(target, i18n)
+    
+    config = Config()
+    if not config.config_file.exists():
+        console.print(i18n.t("config_not_found"), style="yellow")
+        return
+    if not config.is_ready():
+        console.print(i18n.t("api_key_not_configured"), style="yellow")
+        return
+    if not sys.stdin.isatty():
+        console.print(f"[red]{i18n.t('error')}[/red] {i18n.t('live_requires_tty')}")
+        sys.exit(1)
+    
+    primary_lang = config.get("primary_language", "zh-cn")
+    
+    def resolve_target(text):
+        if target:
+            return target
+        # 与普通翻译相同：主语言 → 默认目标语言，其他语言 → 主语言
+        try:
+            detected_lang = detect(text)
+        except:
+            return primary_lang
+        if detected_lang == primary_lang or detected_lang.startswith(primary_lang.split('-')[0]):
+            return config.get("default_target_language", "en")
+        return primary_lang
+    
+    if delay is None:
+        delay = config.get("live.debounce_ms", 300) / 1000
+    session = LiveLookup(
+        TranslationService(config),
+        i18n,
+        resolve_target,
+        debounce=delay,
+        min_chars=config.get("live.min_chars", 1),
+        detect_min_chars=config.get("live.detect_min_chars", 12)
+    )
+    try:
+        asyncio.run(session.run(console))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.group()
+def history():
+    """Search and export past translations."""
+
+
+def _open_history(since):
+    config = Config()
+    store = HistoryStore(config.config_dir / "history.db")
+    try:
+        since_ts = parse_since(since) if since else None
+    except ValueError:
+        i18n = get_i18n()
+        console.print(f"[red]{i18n.t('error')}[/red] {i18n.t('invalid_since')} '{since}'")
+        sys.exit(1)
+    return store, since_ts
+
+
+@history.command(name='search')
+@click.option('--since', help="Only entries newer than this, e.g. 7d, 12h or 2025-01-31")
+@click.option('--lang', help='Only entries with this source or target language')
+@click.option('--limit', '-n', default=20, show_default=True, help='Maximum number of results')
+@click.option('--jsonl', is_flag=True, help='Print results as JSON lines')
+@click.argument('query', nargs=-1, required=True)
+def history_search(since, lang, limit, jsonl, query):
+    """Full-text search over past translations."""
+    store, since_ts = _open_history(since)
+    results = store.search(' '.join(query), since=since_ts, lang=lang, limit=limit)
+    
+    if jsonl:
+        for record in results:
+            click.echo(json.dumps(record, ensure_ascii=False))
+        return
+    
+    i18n = get_i18n()
+    if not results:
+        console.print(i18n.t("history_no_results"), style="yellow")
+        return
+    for record in results:
+        when = datetime.fromtimestamp(record["created_at"]).strftime("%Y-%m-%d %H:%M")
+        title = f"{record['input']}  [dim]{record['source_lang']} → {record['target_lang']} · {when}[/dim]"
+        if not record.get("complete", 1):
+            title += f"  [yellow]{i18n.t('incomplete')}[/yellow]"
+        console.print(Panel(record["output"].strip(), title=title, title_align="left", border_style="dim"))
+
+
+@history.command(name='export')
+@click.option('--since', help="Only entries newer than this, e.g. 7d, 12h or 2025-01-31")
+@click.option('--lang', help='Only entries with this source or target language')
+def history_export(since, lang):
+    """Export past translations as JSON lines."""
+    store, since_ts = _open_history(since)
+    for record in store.export(since=since_ts, lang=lang):
+        click.echo(json.dumps(record, ensure_ascii=False))
+
+
+@cli.group()
+def glossary():
+    """Manage the glossary of required term translations."""
+
+
+@glossary.command(name='import')
+@click.option('--replace', is_flag=True, help='Discard the current glossary instead of merging into it')
+@click.argument('csv_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def glossary_import(replace, csv_file):
+    """Import terms from a CSV file and rebuild the match index."""
+    i18n = get_i18n()
+    config = Config()
+    try:
+        imported = load_csv(csv_file)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        console.print(f"[red]{i18n.t('error')}[/red] {e}")
+        sys.exit(1)
+    
+    # 按术语（忽略大小写）合并，新导入的译文覆盖同一语言的旧译文
+    merged = {}
+    existing = None if replace else Glossary.load(config.config_dir)
+    for entry in (existing.entries if existing else []) + imported:
+        key = fold(entry["term"])
+        if key in merged:
+            merged[key]["translations"].update(entry["translations"])
+            if entry.get("note"):
+                merged[key]["note"] = entry["note"]
+        else:
+            merged[key] = {**entry, "translations": dict(entry["translations"])}
+    
+    Glossary(list(merged.values())).save(config.config_dir)
+    console.print(i18n.t("glossary_imported", count=len(imported), total=len(merged)))
+
+
+@glossary.command(name='match')
+@click.option('--target', '-t', help='Target language code (defaults to your primary language)')
+@click.argument('text', nargs=-1, required=True)
+def glossary_match(target, text):
+    """Show which glossary terms would be added to the prompt for TEXT."""
+    i18n = get_i18n()
+    config = Config()
+    target = target or config.get("primary_language", "zh-cn")
+    validate_language(target, i18n)
+    store = Glossary.load(config.config_dir)
+    terms = store.terms_for([' '.join(text)], target) if store else []
+    if not terms:
+        console.print(i18n.t("glossary_no_match"), style="yellow")
+        return
+    for term in terms:
+        note = f"  [dim]{term['note']}[/dim]" if term.get("note") else ""
+        console.print(f"  [cyan]{term['term']}[/cyan] → [green]{term['translation']}[/green]{note}")
+
+
+@cli.command()
+def stats():
+    """Show usage per API key/endpoint and provider latency."""
+    i18n = get_i18n()
+    config = Config()
+    usage = load_usage(config.config_dir / "endpoint_usage.json")
+    latency = ProviderStats(config.config_dir / "provider_stats.json").summary()
+    if not usage and not latency:
+        console.print(i18n.t("stats_no_data"), style="yellow")
+        return
+    
+    # 列出当前配置中的所有端点，尚未使用过的也显示出来
+    pool = EndpointPool(config.config_dir / "endpoint_usage.json")
+    rows = {}
+    for provider, model_config in (config.get("models", {}) or {}).items():
+        if isinstance(model_config, dict) and config.has_api_key(model_config):
+            for endpoint in pool.endpoints(provider, model_config):
+                rows[endpoint.key] = endpoint.weight
+    for key in usage:
+        rows.setdefault(key, None)
+    
+    table = Table(title=i18n.t("endpoint_usage"), show_header=True, header_style="bold magenta")
+    table.add_column(i18n.t("endpoint"), style="cyan", no_wrap=True)
+    table.add_column(i18n.t("weight"), justify="right")
+    table.add_column(i18n.t("requests"), justify="right")
+    table.add_column(i18n.t("errors"), justify="right")
+    table.add_column(i18n.t("rate_limited"), justify="right")
+    table.add_column(i18n.t("last_used"))
+    for key, weight in rows.items():
+        entry = usage.get(key, {})
+        last_used = entry.get("last_used")
+        table.add_row(
+            key,
+            f"{weight:g}" if weight is not None else "-",
+            str(entry.get("requests", 0)),
+            str(entry.get("errors", 0)),
+            str(entry.get("rate_limited", 0)),
+            datetime.fromtimestamp(last_used).strftime("%Y-%m-%d %H:%M") if last_used else "-"
+        )
+    console.print(table)
+    
+    if latency:
+        table = Table(title=i18n.t("provider_latency"), show_header=True, header_style="bold magenta")
+        table.add_column(i18n.t("provider").rstrip("：: "), style="cyan", no_wrap=True)
+        table.add_column(i18n.t("first_token"), justify="right")
+        table.add_column(i18n.t("error_rate"), justify="right")
+        table.add_column(i18n.t("last_used"))
+        for provider, entry in latency.items():
+            table.add_row(
+                provider,
+                f"{entry['ttft']:.2f}s" if entry.get("ttft") is not None else "-",
+                f"{entry.get('error_rate', 0.0):.0%}",
+                datetime.fromtimestamp(entry["updated"]).strftime("%Y-%m-%d %H:%M") if entry.get("updated") else "-"
+            )
+        console.print(table)
+
+
+@cli.command()
+@click.option('--days', '-d', default=7, show_default=True, help='Number of days to include (today counts as one)')
+@click.option('--by', 'group_by', type=click.Choice(['day', 'model', 'type']), default='day', show_default=True,
+              help='Group by day and model, by model, or by text type')
+def usage(days, group_by):
+    """Show token usage and the daily budget."""
+    i18n = get_i18n()
+    config = Config()
+    store = UsageStore(config.config_dir / "usage.db")
+    since = start_of_day() - (max(days, 1) - 1) * 86400
+    rows = store.report(since, group_by)
+    if not rows:
+        console.print(i18n.t("usage_no_data"), style="yellow")
+        return
+    
+    table = Table(title=i18n.t("usage_title", days=days), show_header=True, header_style="bold magenta")
+    labels = {"day": "date", "provider": "provider", "model": "model", "text_type": "text_type"}
+    keys = [key for key in ("day", "provider", "model", "text_type") if key in rows[0]]
+    for key in keys:
+        table.add_column(i18n.t(labels[key]).rstrip("：: "), style="cyan", no_wrap=True)
+    for key in ("requests", "prompt_tokens", "completion_tokens", "total_tokens", "estimated"):
+        table.add_column(i18n.t(key), justify="right")
+    for row in rows:
+        total = row["prompt_tokens"] + row["completion_tokens"]
+        table.add_row(
+            *[str(row[key] or "-") for key in keys],
+            str(row["requests"]),
+            f"{row['prompt_tokens']:,}",
+            f"{row['completion_tokens']:,}",
+            f"{total:,}",
+            f"{row['estimated'] / row['requests']:.0%}"
+        )
+    console.print(table)
+    
+    budget = TokenBudget(
+        store,
+        daily_tokens=config.get("budget.daily_tokens"),
+        downgrade_at=config.get("budget.downgrade_at", 0.8)
+    )
+    used = store.used_today()
+    line = i18n.t("usage_today", used=f"{used:,}")
+    if budget.daily_tokens:
+        line += i18n.t("usage_budget", limit=f"{budget.daily_tokens:,}", percent=f"{used / budget.daily_tokens:.0%}")
+    console.print(line)
+    if budget.downgraded():
+        console.print(i18n.t("usage_downgraded"), style="yellow")
+
+
+@cli.group(name='i18n')
+def i18n_group():
+    """Translate gettext .po and JSON locale catalogs."""
+
+
+@i18n_group.command(name='translate')
+@click.option('--to', 'targets', required=True, help='Comma-separated target language codes, e.g. ja,de')
+@click.option('--from', 'source_lang', help='Source language code (auto-detected if omitted)')
+@click.option('--output', '-o', help="Output path template, e.g. 'locales/{lang}.json'")
+@click.argument('catalog_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def i18n_translate(targets, source_lang, output, catalog_file):
+    """Translate new or changed strings of a .po/.json catalog."""
+    i18n = get_i18n()
+    targets = [lang.strip() for lang in targets.split(',') if lang.strip()]
+    for lang in targets:
+        validate_language(lang, i18n)
+    
+    config = Config()
+    if not config.config_file.exists():
+        console.print(i18n.t("config_not_found"), style="yellow")
+        return
+    if not config.is_ready():
+        console.print(i18n.t("api_key_not_configured"), style="yellow")
+        return
+    
+    try:
+        catalog = load_catalog(catalog_file)
+    except (ValueError, OSError) as e:
+        console.print(f"[red]{i18n.t('error')}[/red] {e}")
+        sys.exit(1)
+    
+    # 清单记录每条原文的内容哈希及其译文，重复运行时只翻译新增或修改的条目
+    manifest = Manifest(catalog_file.with_name(f"{catalog_file.name}.lu-manifest.json"))
+    translator = TranslationService(config)
+    results = asyncio.run(translate_catalog(translator, catalog, targets, manifest, source_lang))
+    
+    for lang, result in results.items():
+        path = output_path(catalog_file, lang, output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(catalog, PoCatalog) and catalog.has_plurals() and plural_forms(lang) is None:
+            console.print(i18n.t("catalog_plural_skipped", lang=lang), style="yellow")
+        atomic_write(path, catalog.render(result["translations"], lang))
+        console.print(i18n.t(
+            "catalog_summary",
+            lang=lang,
+            translated=result["translated"],
+            reused=result["reused"],
+            failed=result["failed"],
+            path=path
+        ))
+    manifest.save()
 
 
 def show_current_config(config: Config, i18n: I18n) -> None:
@@ -231,8 +829,7 @@ def show_current_config(config: Config, i18n: I18n) -> None:
         console.print(f"  {i18n.t('base_url')} [cyan]{base_url}[/cyan]")
     
     # 显示API密钥状态（不显示实际密钥）
-    api_key = model_config.get("api_key")
-    if api_key:
+    if config.has_api_key(model_config):
         console.print(f"  [green]{i18n.t('api_key_configured')}[/green]")
     else:
         console.print(f"  [yellow]{i18n.t('api_key_not_set')}[/yellow]")
@@ -3,7 +3,7 @@
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class Config:
@@ -77,8 +77,37 @@ class Config:
     def get_current_model_config(self) -> Dict[str, Any]:
         """Get current model configuration."""
         provider = self.get("provider", "openai")
+        if provider == "auto":
+            # auto 模式下以第一个已配置的服务商作为默认值
+            providers = self.configured_providers()
+            return self.get(f"models.{providers[0]}", {}) if providers else {}
         return self.get(f"models.{provider}", {})
     
+    def configured_providers(self) -> List[str]:
+        """Providers that have an API key (and a base URL where one is required)."""
+        providers = []
+        for name, model_config in (self.get("models", {}) or {}).items():
+            if not isinstance(model_config, dict) or not self.has_api_key(model_config):
+                continue
+            if name == "custom" and not (model_config.get("base_url")
+                                         or all(e.get("base_url") for e in model_config.get("endpoints") or [{}])):
+                continue
+            providers.append(name)
+        return providers
+    
+    def is_ready(self) -> bool:
+        """True if the current provider can be used (replay needs no key)."""
+        if self.get("provider", "openai") == "replay":
+            return True
+        return self.has_api_key(self.get_current_model_config())
+    
+    @staticmethod
+    def has_api_key(model_config: Dict[str, Any]) -> bool:
+        """True if the provider has a key itself or in any of its endpoints."""
+        if model_config.get("api_key"):
+            return True
+        return any(isinstance(e, dict) and e.get("api_key") for e in model_config.get("endpoints") or [])
+    
     def update_provider_config(self, provider: str, config: Dict[str, Any]) -> None:
         """Update provider configuration."""
         self.set("provider", provider)
@@ -0,0 +1,185 @@
+"""Weighted load balancing over several API keys / endpoints of a provider."""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# 429 或限流相关的错误信息
+RATE_LIMIT_RE = re.compile(r"\b429\b|rate.?limit|too many requests|throttl", re.IGNORECASE)
+
+
+def is_rate_limited(message: str) -> bool:
+    return bool(RATE_LIMIT_RE.search(message))
+
+
+class Endpoint:
+    """One credential/endpoint pair of a provider, with its live load.
+
+    ``config`` holds the connection settings (the provider config merged
+    with the entry's own keys, without the model); the model is chosen per
+    request, so routes and budget downgrades share the endpoint's load,
+    429 penalty and connection pool. The client is created per endpoint
+    and reused for as long as the same event loop is running.
+    """
+
+    def __init__(self, provider: str, name: str, config: Dict[str, Any], weight: float,
+                 overrides: Dict[str, Any] = None):
+        self.provider = provider
+        self.name = name
+        self.config = config
+        self.overrides = overrides or {}
+        self.weight = max(float(weight), 0.01)
+        self.in_flight = 0
+        self.penalty = 0.0
+        self.penalty_at = 0.0
+        self.cooldown_until = 0.0
+        self._client = None
+        self._client_loop = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}/{self.name}"
+
+    def current_penalty(self, now: float, half_life: float) -> float:
+        return self.penalty * 0.5 ** ((now - self.penalty_at) / half_life)
+
+    def request_config(self, model_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Config for one request: the route's model config with this entry's own keys on top."""
+        config = {k: v for k, v in model_config.items() if k != "endpoints"}
+        config.update(self.overrides)
+        return config
+
+    def client(self, factory: Callable[[Dict[str, Any]], Any]):
+        """Return this endpoint's client, creating it for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # 旧事件循环上的连接不能复用，为当前循环重新建立连接池
+            self._client = factory(self.config)
+            self._client_loop = loop
+        return self._client
+
+
+class EndpointPool:
+    """Picks the least-loaded healthy endpoint and keeps per-entry usage.
+
+    A provider's ``models.<provider>.endpoints`` may list entries with their
+    own ``api_key``, ``base_url``, ``model``, ``weight`` and ``name``; keys
+    missing from an entry are taken from the provider config. Without the
+    list the provider config itself is the only entry.
+
+    The score of an entry is ``(in_flight + 1) / weight``, scaled up by
+    recent 429 responses (which decay with ``penalty_half_life``). An entry
+    that just got a 429 is skipped for an exponentially growing cooldown
+    unless every entry is cooling down.
+    """
+
+    def __init__(self, usage_path: Path, penalty_half_life: float = 60.0, max_cooldown: float = 60.0):
+        self.usage_path = Path(usage_path)
+        self.penalty_half_life = penalty_half_life
+        self.max_cooldown = max_cooldown
+        self._endpoints: Dict[Tuple[str, Optional[str], Optional[str]], Endpoint] = {}
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def endpoints(self, provider: str, model_config: Dict[str, Any]) -> List[Endpoint]:
+        """The provider's endpoints, reusing each one's state across requests.
+
+        Endpoints are identified by provider, base URL and API key only, so
+        a request for another model (a route or budget downgrade) reaches
+        the same Endpoint; use `Endpoint.request_config` to get the config
+        for the request.
+        """
+        base = {k: v for k, v in model_config.items() if k not in ("endpoints", "model")}
+        entries = model_config.get("endpoints") or [{}]
+        result = []
+        for index, entry in enumerate(entries):
+            if len(entries) == 1 and not entry.get("name"):
+                name = provider
+            else:
+                name = str(entry.get("name") or f"{provider}-{index + 1}")
+            overrides = {k: v for k, v in entry.items() if k not in ("name", "weight")}
+            config = dict(base)
+            config.update({k: v for k, v in overrides.items() if k != "model"})
+            identity = (provider, config.get("base_url"), config.get("api_key"))
+            endpoint = self._endpoints.get(identity)
+            if endpoint is None:
+                endpoint = Endpoint(provider, name, config, entry.get("weight", 1), overrides)
+                self._endpoints[identity] = endpoint
+            else:
+                # 名称、权重等设置变化时原地更新，保留负载、限流惩罚和连接池
+                endpoint.name = name
+                endpoint.weight = max(float(entry.get("weight", 1)), 0.01)
+                endpoint.overrides = overrides
+                if endpoint.config != config:
+                    endpoint.config = config
+                    endpoint._client = None
+            if endpoint not in result:
+                result.append(endpoint)
+        return result
+
+    def choose(self, endpoints: List[Endpoint], exclude: List[Endpoint] = ()) -> Optional[Endpoint]:
+        candidates = [e for e in endpoints if e not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [e for e in candidates if e.cooldown_until <= now]
+        if not healthy:
+            # 全部处于冷却期时，选最早恢复的那个
+            return min(candidates, key=lambda e: e.cooldown_until)
+        return min(healthy, key=lambda e: (e.in_flight + 1) / e.weight
+                   * (1.0 + e.current_penalty(now, self.penalty_half_life)))
+
+    def acquire(self, endpoint: Endpoint) -> None:
+        endpoint.in_flight += 1
+
+    def release(self, endpoint: Endpoint, error: bool = False, rate_limited: bool = False) -> None:
+        """Finish a request on endpoint and record its outcome."""
+        endpoint.in_flight = max(0, endpoint.in_flight - 1)
+        now = time.monotonic()
+        if rate_limited:
+            endpoint.penalty = endpoint.current_penalty(now, self.penalty_half_life) + 1.0
+            endpoint.penalty_at = now
+            endpoint.cooldown_until = now + min(self.max_cooldown, 2 ** endpoint.penalty)
+
+        with self._lock:
+            usage = self._pending.setdefault(endpoint.key, {"requests": 0, "errors": 0, "rate_limited": 0})
+            usage["requests"] += 1
+            usage["errors"] += 1 if error else 0
+            usage["rate_limited"] += 1 if rate_limited else 0
+            usage["last_used"] = time.time()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def flush(self) -> None:
+        """Add pending counters to the usage file (other processes may share it)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            data = load_usage(self.usage_path)
+            for key, delta in pending.items():
+                entry = data.setdefault(key, {"requests": 0, "errors": 0, "rate_limited": 0})
+                for field in ("requests", "errors", "rate_limited"):
+                    entry[field] = entry.get(field, 0) + delta[field]
+                entry["last_used"] = delta["last_used"]
+            self.usage_path.parent.mkdir(exist_ok=True)
+            tmp_path = self.usage_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            tmp_path.replace(self.usage_path)
+
+
+def load_usage(path: Path) -> Dict[str, Dict[str, float]]:
+    """Per-endpoint usage counters keyed by 'provider/name'."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,261 @@
+"""Full-text searchable translation history for lookup-cli."""
+
+import atexit
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    source_lang TEXT,
+    target_lang TEXT,
+    provider TEXT,
+    model TEXT,
+    input TEXT NOT NULL,
+    output TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_history_created ON history (created_at);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, input, output) VALUES (new.id, new.input, new.output);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, input, output) VALUES ('delete', old.id, old.input, old.output);
+END;
+CREATE TRIGGER IF NOT EXISTS history_grams_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_grams (rowid, input, output) VALUES (new.id, lu_grams(new.input), lu_grams(new.output));
+END;
+CREATE TRIGGER IF NOT EXISTS history_grams_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_grams (history_grams, rowid, input, output)
+    VALUES ('delete', old.id, lu_grams(old.input), lu_grams(old.output));
+END;
+"""
+
+# trigram 分词器支持中日韩等不以空格分词的语言的子串搜索，但查询词至少需要 3 个字符
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+    "input, output, content='history', content_rowid='id', tokenize='trigram')"
+)
+
+# 1-2 个字符的查询词使用二元组索引：每段连续的字母/数字拆成相邻两字的词元，
+# 并在末尾附加最后一个字，这样任意长度的子串都能用词组查询命中
+GRAMS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS history_grams USING fts5("
+    "input, output, content='', tokenize='unicode61 remove_diacritics 0')"
+)
+
+RUN_RE = re.compile(r"[^\W_]+")
+
+COLUMNS = ["created_at", "source_lang", "target_lang", "provider", "model", "input", "output", "complete"]
+
+
+def parse_since(value: str) -> float:
+    """Parse '30m', '12h', '7d', '2w' or an ISO date into a Unix timestamp."""
+    match = re.fullmatch(r"(\d+)\s*([mhdw])", value.strip())
+    if match:
+        seconds = {"m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return time.time() - int(match.group(1)) * seconds
+    return datetime.fromisoformat(value.strip()).timestamp()
+
+
+def text_grams(text: Optional[str]) -> str:
+    """Bigram tokens of text for the short-query index, separated by spaces."""
+    grams: List[str] = []
+    for run in RUN_RE.findall((text or "").lower()):
+        grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+        grams.append(run[-1])
+    return " ".join(grams)
+
+
+def grams_query(term: str) -> Optional[str]:
+    """FTS5 phrase matching term as a substring in the bigram index."""
+    runs = RUN_RE.findall(term.lower())
+    if not runs:
+        return None
+    grams: List[str] = []
+    for run in runs[:-1]:
+        # 中间的片段在原文中同样以标点结束，末尾单字一定存在
+        grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+        grams.append(run[-1])
+    last = runs[-1]
+    if len(last) == 1:
+        # 单字可能是某个二元组的开头，用前缀匹配
+        return '"{}"*'.format(" ".join(grams + [last]))
+    grams.extend(last[i:i + 2] for i in range(len(last) - 1))
+    return '"{}"'.format(" ".join(grams))
+
+
+class HistoryStore:
+    """SQLite + FTS5 store of past translations.
+
+    `add` only enqueues a record; a background thread writes queued records
+    in batches, so saving history never delays rendering. Pending records
+    are flushed when the store is closed or the process exits.
+    """
+
+    def __init__(self, db_path: Path, batch_size: int = 100, flush_interval: float = 1.0):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.create_function("lu_grams", 1, text_grams, deterministic=True)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(FTS_SCHEMA)
+        has_grams = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_grams'"
+        ).fetchone()
+        conn.execute(GRAMS_SCHEMA)
+        conn.executescript(SCHEMA)
+        # 旧版本创建的数据库没有 complete 列和二元组索引
+        if "complete" not in {row[1] for row in conn.execute("PRAGMA table_info(history)")}:
+            conn.execute("ALTER TABLE history ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+        if not has_grams:
+            with conn:
+                conn.execute(
+                    "INSERT INTO history_grams (rowid, input, output) "
+                    "SELECT id, lu_grams(input), lu_grams(output) FROM history"
+                )
+        return conn
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Queue a translation for writing (``complete: 0`` marks a cancelled, partial one)."""
+        record.setdefault("created_at", time.time())
+        record.setdefault("complete", 1)
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="lu-history", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+        self._queue.put(record)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        try:
+            stop = False
+            while not stop:
+                record = self._queue.get()
+                if record is None:
+                    break
+                batch = [record]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if record is None:
+                        stop = True
+                        break
+                    batch.append(record)
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO history ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        [tuple(r.get(c) for c in COLUMNS) for r in batch]
+                    )
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer thread."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _filters(self, since: Optional[float], lang: Optional[str]):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("h.created_at >= ?")
+            params.append(since)
+        if lang:
+            clauses.append("(h.source_lang = ? OR h.target_lang = ?)")
+            params.extend([lang, lang])
+        return clauses, params
+
+    def search(self, query: str, since: float = None, lang: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return matches for query, best first (BM25)."""
+        if not self.db_path.exists():
+            return []
+        clauses, params = self._filters(since, lang)
+        terms = query.split()
+        conn = self._connect()
+        try:
+            if not terms:
+                sql = "SELECT h.* FROM history h"
+                if clauses:
+                    sql += " WHERE " + " AND ".join(clauses)
+                rows = conn.execute(sql + " ORDER BY h.created_at DESC LIMIT ?", params + [limit]).fetchall()
+                return [dict(row) for row in rows]
+            if all(len(term) >= 3 for term in terms):
+                table = "history_fts"
+                match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            else:
+                # trigram 索引要求查询词至少 3 个字符，较短的查询使用二元组索引
+                table = "history_grams"
+                phrases = [grams_query(term) for term in terms]
+                if any(phrase is None for phrase in phrases):
+                    return []
+                match = " ".join(phrases)
+            return self._ranked(conn, table, match, clauses, params, limit)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _ranked(conn: sqlite3.Connection, table: str, match: str, clauses: List[str],
+                params: List[Any], limit: int) -> List[Dict[str, Any]]:
+        """Best-ranked rows passing the filters.
+
+        Ranking and LIMIT run inside the FTS query, so only as many matches
+        are ranked as the filters need; with filters the window grows until
+        enough rows pass or the matches run out.
+        """
+        found: List[Dict[str, Any]] = []
+        offset, window = 0, limit if not clauses else limit * 4
+        while len(found) < limit:
+            ids = [row[0] for row in conn.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                (match, window, offset)
+            )]
+            if ids:
+                sql = f"SELECT h.* FROM history h WHERE h.id IN ({', '.join('?' * len(ids))})"
+                for clause in clauses:
+                    sql += f" AND {clause}"
+                rows = {row["id"]: dict(row) for row in conn.execute(sql, ids + params)}
+                found.extend(rows[i] for i in ids if i in rows)
+            if len(ids) < window:
+                break
+            offset += window
+            window = min(window * 4, 500)
+        return found[:limit]
+
+    def export(self, since: float = None, lang: str = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over all records matching the filters, oldest first."""
+        if not self.db_path.exists():
+            return
+        clauses, params = self._filters(since, lang)
+        sql = "SELECT h.* FROM history h"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        conn = self._connect()
+        try:
+            for row in conn.execute(sql + " ORDER BY h.created_at", params):
+                yield dict(row)
+        finally:
+            conn.close()
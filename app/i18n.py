@@ -30,6 +30,7 @@ class I18n:
                 "target": "🎯 目标语言：",
                 "translation_result": "🌐 翻译结果",
                 "thinking": "🤖 思考中...",
+                "grammar_analysis": "📖 语法分析与示例",
                 "supported_languages": "🌍 支持的语言",
                 "language_code": "语言代码",
                 "language_name": "语言名称",
@@ -57,7 +58,49 @@ class I18n:
                 "primary_language": "主语言：",
                 "base_url": "基础URL：",
                 "api_key_configured": "API密钥：已配置",
-                "api_key_not_set": "API密钥：未设置"
+                "api_key_not_set": "API密钥：未设置",
+                "similar_translation": "📚 相似的历史翻译（相似度 {similarity}）",
+                "tm_no_match": "⚠️  翻译记忆中没有找到相似的翻译。",
+                "batch_items": "📦 共 {count} 个条目",
+                "file_not_found": "找不到文件：",
+                "watch_line_failed": "⚠️  翻译失败：{line}\n   {error}",
+                "catalog_summary": "✅ {lang}: 新翻译 {translated} 条，复用 {reused} 条，失败 {failed} 条 → {path}",
+                "catalog_plural_skipped": "⚠️  {lang}: 未知的复数规则，复数条目保留为空",
+                "history_no_results": "🔍 没有找到匹配的历史记录。",
+                "invalid_since": "无法识别的时间",
+                "live_help": "输入即翻译 · Enter 保存到历史 · Ctrl-U 清空 · Esc 退出",
+                "live_saved": "已保存到历史",
+                "live_cached": "（本次会话缓存）",
+                "live_requires_tty": "live 模式需要在交互式终端中运行",
+                "route": "路由",
+                "first_token": "首字",
+                "total_time": "总耗时",
+                "endpoint_usage": "🔑 各端点使用情况",
+                "provider_latency": "⏱️  服务商延迟（auto 模式）",
+                "stats_no_data": "暂无使用记录。",
+                "endpoint": "端点",
+                "weight": "权重",
+                "requests": "请求数",
+                "errors": "错误",
+                "rate_limited": "限流 (429)",
+                "last_used": "最近使用",
+                "error_rate": "错误率",
+                "glossary_imported": "✅ 已导入 {count} 个术语，术语表共 {total} 个",
+                "glossary_no_match": "术语表中没有匹配的术语。",
+                "interrupted_incomplete": "⏹️  已中断，以上结果不完整（已停止请求）",
+                "incomplete": "不完整",
+                "usage_title": "📊 最近 {days} 天的 token 用量",
+                "usage_no_data": "暂无 token 用量记录。",
+                "usage_today": "今日已用 {used} tokens",
+                "usage_budget": "，每日预算 {limit}（{percent}）",
+                "usage_downgraded": "⚠️  接近每日预算，已切换为简短输出和更便宜的模型",
+                "date": "日期",
+                "text_type": "类型",
+                "prompt_tokens": "输入",
+                "completion_tokens": "输出",
+                "total_tokens": "合计",
+                "estimated": "估算",
+                "auto_selected_target": "🎯 已根据您的选择习惯自动选择目标语言 {target}（使用 -t 指定其他语言）"
             },
             "en": {
                 "welcome_title": "🚀 Welcome to Lu - Lookup CLI Setup",
@@ -81,6 +124,7 @@ class I18n:
                 "target": "🎯 Target:",
                 "translation_result": "🌐 Translation Result",
                 "thinking": "🤖 Thinking...",
+                "grammar_analysis": "📖 Grammar & Examples",
                 "supported_languages": "🌍 Supported Languages",
                 "language_code": "Language Code",
                 "language_name": "Language Name",
@@ -108,7 +152,49 @@ class I18n:
                 "primary_language": "Primary Language:",
                 "base_url": "Base URL:",
                 "api_key_configured": "API Key: Configured",
-                "api_key_not_set": "API Key: Not set"
+                "api_key_not_set": "API Key: Not set",
+                "similar_translation": "📚 Similar past translation ({similarity} similar)",
+                "tm_no_match": "⚠️  No similar translation found in translation memory.",
+                "batch_items": "📦 {count} items",
+                "file_not_found": "File not found:",
+                "watch_line_failed": "⚠️  Translation failed: {line}\n   {error}",
+                "catalog_summary": "✅ {lang}: {translated} translated, {reused} reused, {failed} failed → {path}",
+                "catalog_plural_skipped": "⚠️  {lang}: unknown plural rules, plural entries left empty",
+                "history_no_results": "🔍 No matching history entries.",
+                "invalid_since": "Invalid time",
+                "live_help": "Type to translate · Enter saves to history · Ctrl-U clears · Esc exits",
+                "live_saved": "saved to history",
+                "live_cached": "(cached this session)",
+                "live_requires_tty": "live mode must be run in an interactive terminal",
+                "route": "route",
+                "first_token": "first token",
+                "total_time": "total",
+                "endpoint_usage": "🔑 Usage per endpoint",
+                "provider_latency": "⏱️  Provider latency (auto mode)",
+                "stats_no_data": "No usage recorded yet.",
+                "endpoint": "Endpoint",
+                "weight": "Weight",
+                "requests": "Requests",
+                "errors": "Errors",
+                "rate_limited": "Rate limited (429)",
+                "last_used": "Last used",
+                "error_rate": "Error rate",
+                "glossary_imported": "✅ Imported {count} terms, {total} in the glossary",
+                "glossary_no_match": "No glossary terms match.",
+                "interrupted_incomplete": "⏹️  Interrupted: the result above is incomplete (request stopped)",
+                "incomplete": "incomplete",
+                "usage_title": "📊 Token usage, last {days} days",
+                "usage_no_data": "No token usage recorded yet.",
+                "usage_today": "Used today: {used} tokens",
+                "usage_budget": " of a {limit} daily budget ({percent})",
+                "usage_downgraded": "⚠️  Close to the daily budget: using brief output and cheaper models",
+                "date": "Date",
+                "text_type": "Type",
+                "prompt_tokens": "Prompt",
+                "completion_tokens": "Completion",
+                "total_tokens": "Total",
+                "estimated": "Estimated",
+                "auto_selected_target": "🎯 Auto-selected target {target} based on your past choices (use -t to pick another)"
             }
         }
     
@@ -0,0 +1,244 @@
+"""Type-ahead live lookup mode for lookup-cli."""
+
+import asyncio
+import codecs
+import os
+import re
+import sys
+import threading
+from contextlib import aclosing, contextmanager
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.text import Text
+
+from .i18n import I18n
+from .memory import normalize_text
+from .translator import TranslationService
+
+
+EXIT_KEYS = {"\x1b", "\x03", "\x04"}     # Esc、Ctrl-C、Ctrl-D
+BACKSPACE_KEYS = {"\x7f", "\x08"}
+ENTER_KEYS = {"\r", "\n"}
+CLEAR_KEY = "\x15"                        # Ctrl-U
+
+# 方向键等转义序列，直接忽略
+ESCAPE_SEQUENCE_RE = re.compile(r"\x1b(?:\[[0-9;?]*[A-Za-z~]|O.)")
+
+
+@contextmanager
+def key_reader(loop: asyncio.AbstractEventLoop, on_key: Callable[[str], None]):
+    """Deliver single keypresses to on_key without waiting for Enter."""
+    if os.name == "nt":
+        import msvcrt
+
+        stop = threading.Event()
+
+        def poll():
+            while not stop.is_set():
+                if msvcrt.kbhit():
+                    loop.call_soon_threadsafe(on_key, msvcrt.getwch())
+                else:
+                    stop.wait(0.01)
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+        return
+
+    import termios
+    import tty
+
+    fd = sys.stdin.fileno()
+    old_attrs = termios.tcgetattr(fd)
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def readable():
+        data = decoder.decode(os.read(fd, 1024))
+        if data == "\x1b":
+            on_key(data)
+            return
+        for ch in ESCAPE_SEQUENCE_RE.sub("", data):
+            on_key(ch)
+
+    tty.setcbreak(fd)
+    loop.add_reader(fd, readable)
+    try:
+        yield
+    finally:
+        loop.remove_reader(fd)
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+
+
+class LiveLookup:
+    """Full-screen prompt that translates while the user types.
+
+    Every change cancels the in-flight request at once; a new one starts
+    after ``debounce`` seconds without further changes, and only if the
+    normalized text (case, whitespace and punctuation ignored) differs from
+    what was last requested. Finished results are cached for the session,
+    so returning to an earlier text shows its result immediately.
+
+    Intermediate prefixes ("hel", "hello", ...) are never written to
+    history, translation memory or cassettes: only the text showing when
+    the user presses Enter or exits is saved. While the input is shorter
+    than ``detect_min_chars`` the previously resolved target is kept, since
+    language detection on a few characters flips between languages.
+    """
+
+    def __init__(
+        self,
+        translator: TranslationService,
+        i18n: I18n,
+        resolve_target: Callable[[str], str],
+        debounce: float = 0.3,
+        min_chars: int = 1,
+        detect_min_chars: int = 12
+    ):
+        self.translator = translator
+        self.i18n = i18n
+        self.resolve_target = resolve_target
+        self.debounce = debounce
+        self.min_chars = min_chars
+        self.detect_min_chars = detect_min_chars
+
+        self.text = ""
+        self.target = ""
+        self.status = ""
+        self.sections: Dict[str, str] = {}
+        self.cache: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # 已完成请求的结果，按 Enter 或退出时只保存当前输入对应的那一个
+        self.results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._saved: Set[Tuple[str, str]] = set()
+        self._save_when_done: Optional[Tuple[str, str]] = None
+
+        self._requested: Optional[Tuple[str, str]] = None
+        self._request: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._live: Optional[Live] = None
+
+    def render(self):
+        prompt = Text.assemble(("› ", "bold cyan"), self.text, ("▏", "blink"))
+        status = Text(f"{self.target}  {self.status}".strip(), style="dim")
+        parts = [prompt, status, Text(self.i18n.t("live_help"), style="dim")]
+        if self.sections.get("translation"):
+            parts.append(Panel(self.sections["translation"], title=self.i18n.t("translation_result"),
+                               border_style="blue"))
+        if self.sections.get("analysis"):
+            parts.append(Panel(self.sections["analysis"], title=self.i18n.t("grammar_analysis"),
+                               border_style="cyan"))
+        return Group(*parts)
+
+    def _refresh(self) -> None:
+        if self._live:
+            self._live.update(self.render(), refresh=True)
+
+    async def run(self, console: Console) -> None:
+        loop = asyncio.get_running_loop()
+        keys: asyncio.Queue = asyncio.Queue()
+
+        with key_reader(loop, keys.put_nowait), \
+                Live(self.render(), console=console, screen=True, auto_refresh=False) as live:
+            self._live = live
+            try:
+                while True:
+                    key = await keys.get()
+                    if key in EXIT_KEYS:
+                        break
+                    if key in ENTER_KEYS:
+                        self._save_current()
+                        self._refresh()
+                        continue
+                    if key in BACKSPACE_KEYS:
+                        self.text = self.text[:-1]
+                    elif key == CLEAR_KEY:
+                        self.text = ""
+                    elif key.isprintable():
+                        self.text += key
+                    else:
+                        continue
+                    self._on_change()
+                    self._refresh()
+            finally:
+                self._save_current()
+                self._cancel_pending()
+                self._live = None
+
+    def _save_current(self) -> None:
+        """Save the result for the text being shown, once its request has finished."""
+        key = self._requested
+        if key is None or key in self._saved:
+            return
+        if key not in self.results:
+            # 请求还在进行中：完成后再保存（退出时会被取消，不保存）
+            self._save_when_done = key
+            return
+        self._saved.add(key)
+        self.translator.save_result(self.results[key])
+        self.status = self.i18n.t("live_saved")
+
+    def _cancel_pending(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._request and not self._request.done():
+            # 取消任务会关闭翻译生成器及其上游流
+            self._request.cancel()
+        self._request = None
+
+    def _on_change(self) -> None:
+        norm = normalize_text(self.text)
+        if len(norm) < self.min_chars:
+            self._cancel_pending()
+            self._requested = None
+            self.sections, self.status, self.target = {}, "", ""
+            return
+
+        # 输入太短时语言检测不可靠，沿用之前的目标语言
+        if not self.target or len(norm) >= self.detect_min_chars:
+            self.target = self.resolve_target(self.text)
+        key = (norm, self.target)
+        if key == self._requested:
+            # 只是大小写、空白或标点的变化，继续当前请求
+            return
+
+        self._cancel_pending()
+        self._requested = None
+        self._save_when_done = None
+        if key in self.cache:
+            self._requested = key
+            self.sections = self.cache[key]
+            self.status = self.i18n.t("live_cached")
+            return
+
+        self.status = "…"
+        self._timer = asyncio.get_running_loop().call_later(self.debounce, self._start, key, self.text)
+
+    def _start(self, key: Tuple[str, str], text: str) -> None:
+        self._timer = None
+        self._requested = key
+        self.sections = {}
+        self.status = self.i18n.t("thinking")
+        self._request = asyncio.create_task(self._translate(key, text))
+        self._refresh()
+
+    async def _translate(self, key: Tuple[str, str], text: str) -> None:
+        sections: Dict[str, str] = {}
+        self.sections = sections
+        async with aclosing(self.translator.translate_sections(text, key[1], persist=False)) as stream:
+            async for section, chunk in stream:
+                sections[section] = sections.get(section, "") + chunk
+                self._refresh()
+        result = self.translator.last_result
+        self.status = ""
+        if not any("❌ Error" in content for content in sections.values()):
+            self.cache[key] = sections
+            self.results[key] = result
+            if self._save_when_done == key:
+                self._save_current()
+        self._refresh()
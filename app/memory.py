@@ -0,0 +1,196 @@
+"""Fuzzy translation memory for lookup-cli."""
+
+import hashlib
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+
+# MinHash 签名长度以及 LSH 分桶方式（16 个 band，每个 band 4 行）
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# 短文本（单词等）只做精确匹配，避免 apple / apply 这类误命中
+MIN_FUZZY_LENGTH = 12
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_BUCKET_MASK = (1 << 63) - 1
+
+
+def _seeded_permutations():
+    """Generate deterministic (a, b) pairs for the MinHash permutations."""
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"lu-minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:], "little") % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+_PERMUTATIONS = _seeded_permutations()
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text, drop punctuation and collapse whitespace."""
+    chars = []
+    for ch in unicodedata.normalize("NFKC", text).lower():
+        if unicodedata.category(ch).startswith("P"):
+            chars.append(" ")
+        else:
+            chars.append(ch)
+    return " ".join("".join(chars).split())
+
+
+def trigrams(norm: str) -> Set[str]:
+    """Character trigrams of a normalized string, padded at both ends."""
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def minhash(grams: Set[str]) -> List[int]:
+    """Compute the MinHash signature of a trigram set."""
+    hashes = [_hash64(g) for g in grams]
+    signature = []
+    for a, b in _PERMUTATIONS:
+        signature.append(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes))
+    return signature
+
+
+def band_buckets(signature: List[int], target_lang: str) -> List[int]:
+    """Hash each LSH band (scoped to the target language) into a bucket id."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        key = f"{target_lang}|{band}|" + ",".join(map(str, rows))
+        buckets.append(_hash64(key) & _BUCKET_MASK)
+    return buckets
+
+
+class TranslationMemory:
+    """Stores completed translations and finds close matches for new input.
+
+    Entries live in a SQLite database; near-duplicate lookup uses MinHash
+    signatures over character trigrams with an LSH band index, so a query
+    touches a handful of index rows regardless of how many entries exist.
+    """
+
+    def __init__(self, db_path: Path, threshold: float = 0.7):
+        self.db_path = Path(db_path)
+        self.threshold = threshold
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    norm TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    source_lang TEXT,
+                    model TEXT,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    UNIQUE (norm, target_lang)
+                );
+                CREATE TABLE IF NOT EXISTS buckets (
+                    bucket INTEGER NOT NULL,
+                    entry_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_buckets ON buckets (bucket);
+                """
+            )
+        return self._conn
+
+    def add(self, text: str, source_lang: str, target_lang: str, result: str, model: str = None) -> None:
+        """Store (or refresh) a completed translation."""
+        norm = normalize_text(text)
+        if not norm or not result.strip():
+            return
+
+        conn = self.conn
+        with conn:
+            row = conn.execute(
+                "SELECT id FROM entries WHERE norm = ? AND target_lang = ?",
+                (norm, target_lang)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE entries SET source = ?, source_lang = ?, model = ?, result = ?, created_at = ? WHERE id = ?",
+                    (text, source_lang, model, result, time.time(), row[0])
+                )
+                return
+
+            cursor = conn.execute(
+                "INSERT INTO entries (norm, target_lang, source, source_lang, model, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (norm, target_lang, text, source_lang, model, result, time.time())
+            )
+            if len(norm) >= MIN_FUZZY_LENGTH:
+                buckets = band_buckets(minhash(trigrams(norm)), target_lang)
+                conn.executemany(
+                    "INSERT INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                    [(bucket, cursor.lastrowid) for bucket in buckets]
+                )
+
+    def lookup(self, text: str, target_lang: str) -> Optional[Dict[str, Any]]:
+        """Return the closest stored translation above the threshold, if any."""
+        norm = normalize_text(text)
+        if not norm:
+            return None
+
+        conn = self.conn
+        row = conn.execute(
+            "SELECT source, result FROM entries WHERE norm = ? AND target_lang = ?",
+            (norm, target_lang)
+        ).fetchone()
+        if row:
+            return {"source": row[0], "result": row[1], "similarity": 1.0}
+
+        if len(norm) < MIN_FUZZY_LENGTH:
+            return None
+
+        grams = trigrams(norm)
+        buckets = band_buckets(minhash(grams), target_lang)
+        placeholders = ",".join("?" * len(buckets))
+        candidates = conn.execute(
+            f"SELECT e.norm, e.source, e.result, COUNT(*) AS hits FROM buckets b "
+            f"JOIN entries e ON e.id = b.entry_id "
+            f"WHERE b.bucket IN ({placeholders}) "
+            f"GROUP BY b.entry_id ORDER BY hits DESC LIMIT 20",
+            buckets
+        ).fetchall()
+
+        best = None
+        for cand_norm, source, result, _ in candidates:
+            similarity = jaccard(grams, trigrams(cand_norm))
+            if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                best = {"source": source, "result": result, "similarity": similarity}
+        return best
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,86 @@
+"""Pack many short items into a single translation request."""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+# 粗略估算：英文约 4 字符/token，CJK 约 1 字符/token
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for sizing packs."""
+    wide = sum(1 for ch in text if ord(ch) > 0x2E80)
+    return max(1, wide + (len(text) - wide + 3) // 4)
+
+
+# 每个条目输出的大致 token 数（译文 + 读音/词性 + 一句简短说明）
+OUTPUT_TOKENS_PER_ITEM = 60
+PROMPT_OVERHEAD_TOKENS = 200
+
+
+def plan_packs(items: List[str], token_budget: int = 3000, max_items: int = 50) -> List[List[int]]:
+    """Split item indices into packs whose estimated cost fits the token budget.
+
+    The budget covers the item text plus the expected output for each item,
+    so long phrases get smaller packs than single words.
+    """
+    packs: List[List[int]] = []
+    current: List[int] = []
+    used = PROMPT_OVERHEAD_TOKENS
+    for index, item in enumerate(items):
+        cost = estimate_tokens(item) * 2 + OUTPUT_TOKENS_PER_ITEM
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            packs.append(current)
+            current = []
+            used = PROMPT_OVERHEAD_TOKENS
+        current.append(index)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_pack_prompt(items: List[Tuple[int, str]], source_name: str, target_name: str, primary_name: str,
+                      notes: bool = True) -> str:
+    """Create a prompt that asks for one JSON object per line, one per item."""
+    listing = "\n".join(json.dumps({"id": i, "text": text}, ensure_ascii=False) for i, text in items)
+    if notes:
+        line_format = '{"id": 编号, "translation": "译文", "note": "读音、词性或简短说明"}'
+        note_rule = f'"note" 使用{primary_name}语言，保持简短'
+    else:
+        line_format = '{"id": 编号, "translation": "译文"}'
+        note_rule = "只输出译文，不要添加任何说明"
+    rules = [
+        f"每个条目输出且只输出一行 JSON，格式为 {line_format}",
+        '"id" 必须与输入一致，按输入顺序输出，不要遗漏任何条目',
+        note_rule
+    ]
+    if any("⟦" in text for _, text in items):
+        # 本地化文件中的占位符被替换成了 ⟦n⟧ 标记，译文中缺少任何一个都会判为失败
+        rules.append("形如 ⟦0⟧ 的标记是占位符，必须原样复制到译文中的合适位置，不要翻译、修改、增加或删除")
+    rules.append("不要输出任何其他内容，不要使用markdown或代码块")
+    numbered = "\n            ".join(f"{i}. {rule}{'。' if i == len(rules) else '；'}"
+                                    for i, rule in enumerate(rules, 1))
+    return f"""
+            将下面每一行 JSON 中的 "text" 从 {source_name} 翻译到 {target_name}。
+
+            {listing}
+
+            要求：
+            {numbered}
+            """
+
+
+def parse_pack_line(line: str, expected: Dict[int, str]) -> Optional[Tuple[int, str]]:
+    """Parse one output line into (id, formatted result), or None if unusable."""
+    line = line.strip().strip(",")
+    if not line.startswith("{"):
+        return None
+    try:
+        data = json.loads(line)
+        index = int(data["id"])
+        translation = str(data["translation"]).strip()
+    except (ValueError, KeyError, TypeError):
+        return None
+    if index not in expected or not translation:
+        return None
+    note = str(data.get("note") or "").strip()
+    return index, f"{translation}  ({note})" if note else translation
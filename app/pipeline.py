@@ -0,0 +1,196 @@
+"""Multi-process preparation stage for bulk translation."""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from langdetect import DetectorFactory, detect, detect_langs
+
+from .classifier import classify_text
+from .packing import build_pack_prompt, plan_packs
+from .translator import LANG_NAMES, TranslationService
+
+
+# 短行（尤其是单个单词）的语言检测结果接近随机，只有足够长且置信度高的行才单独分组
+MIN_DETECT_CHARS = 30
+MIN_DETECT_PROB = 0.9
+
+
+def _init_worker() -> None:
+    # 固定随机种子，保证各进程的检测结果可复现
+    DetectorFactory.seed = 0
+
+
+def detect_source(lines: List[str]) -> str:
+    """Source language of a job, detected once over its first lines like translate_items does."""
+    try:
+        return detect(" ".join(lines[:20]))
+    except Exception:
+        return "auto"
+
+
+def prepare_chunk(
+    start: int,
+    lines: List[str],
+    source_lang: str,
+    target_lang: str,
+    primary_lang: str,
+    token_budget: int,
+    notes: bool
+) -> List[Dict[str, Any]]:
+    """Classify and pack one chunk of lines (runs in a worker process).
+
+    Every line is assumed to be in the job's source language, except long
+    lines that are confidently detected as another language; those get
+    packs (and prompts) of their own. Ids in the returned packs are global
+    line indices.
+    """
+    groups: Dict[str, List[int]] = {}
+    types: List[str] = []
+    for offset, line in enumerate(lines):
+        lang = source_lang
+        if len(line) >= MIN_DETECT_CHARS:
+            try:
+                best = detect_langs(line)[0]
+                if best.prob >= MIN_DETECT_PROB:
+                    lang = best.lang
+            except Exception:
+                pass
+        groups.setdefault(lang, []).append(offset)
+        types.append(classify_text(line))
+
+    target_name = LANG_NAMES.get(target_lang, target_lang)
+    primary_name = LANG_NAMES.get(primary_lang, primary_lang)
+    packs = []
+    for lang, offsets in groups.items():
+        source_name = LANG_NAMES.get(lang, lang)
+        for pack in plan_packs([lines[o] for o in offsets], token_budget):
+            members = [offsets[i] for i in pack]
+            expected = {start + o: lines[o] for o in members}
+            kinds = {types[o] for o in members}
+            packs.append({
+                "expected": expected,
+                "prompt": build_pack_prompt(list(expected.items()), source_name, target_name, primary_name, notes),
+                "text_type": "word" if kinds == {"word"} else ("sentence" if "sentence" in kinds else "phrase"),
+                "longest": max(expected.values(), key=len)
+            })
+    return packs
+
+
+class BulkPipeline:
+    """Two-stage pipeline for very large item lists.
+
+    The CPU-bound stage (classification, language detection of long lines,
+    packing and prompt building) runs in a process pool on chunks of lines.
+    Its packs flow through a bounded queue into the I/O-bound request
+    stage, which keeps `batch.concurrency` requests in flight on the event
+    loop.
+    """
+
+    def __init__(
+        self,
+        translator: TranslationService,
+        target_lang: str,
+        workers: int = None,
+        chunk_size: int = 1000,
+        notes: bool = True,
+        source_lang: str = None
+    ):
+        config = translator.config
+        self.translator = translator
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        # prepared() 中确定的整批源语言，重试遗漏条目时沿用
+        self.job_lang: Optional[str] = source_lang
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.notes = notes
+        self.primary_lang = config.get("primary_language", "zh-cn")
+        self.token_budget = translator.pack_token_budget()
+        self.concurrency = config.get("batch.concurrency", 4)
+
+    async def prepared(self, lines: List[str]) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield packs in input order, keeping at most 2 chunks per worker in flight."""
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        starts = iter(range(0, len(lines), self.chunk_size))
+        in_flight: deque = deque()
+        source_lang = self.job_lang = self.source_lang or detect_source(lines)
+
+        def submit() -> None:
+            start = next(starts, None)
+            if start is not None:
+                in_flight.append(loop.run_in_executor(
+                    executor, prepare_chunk, start, lines[start:start + self.chunk_size],
+                    source_lang, self.target_lang, self.primary_lang, self.token_budget, self.notes
+                ))
+
+        try:
+            for _ in range(self.workers * 2):
+                submit()
+            while in_flight:
+                packs = await in_flight.popleft()
+                submit()
+                for pack in packs:
+                    yield pack
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, lines: List[str]) -> AsyncGenerator[Tuple[int, str], None]:
+        """Translate lines, yielding (index, result) as each result is parsed."""
+        packs: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        done = set()
+
+        async def produce() -> None:
+            try:
+                async for pack in self.prepared(lines):
+                    # 请求阶段跟不上时在这里等待，准备阶段随之暂停
+                    await packs.put(pack)
+            finally:
+                for _ in range(self.concurrency):
+                    await packs.put(None)
+
+        async def consume() -> None:
+            while True:
+                pack = await packs.get()
+                if pack is None:
+                    return
+                route = self.translator.resolve_route(pack["longest"], pack["text_type"])
+                section = self.translator.glossary_section(list(pack["expected"].values()), self.target_lang)
+                if section:
+                    pack["prompt"] = f"{pack['prompt'].rstrip()}\n\n{section}\n"
+                try:
+                    async for index, result in self.translator.stream_pack(pack["expected"], pack["prompt"], route):
+                        done.add(index)
+                        await results.put((index, result))
+                except Exception:
+                    continue
+
+        async def run_all() -> None:
+            try:
+                await asyncio.gather(produce(), *(consume() for _ in range(self.concurrency)),
+                                     return_exceptions=True)
+            finally:
+                await results.put(None)
+
+        runner = asyncio.create_task(run_all())
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            if not runner.done():
+                runner.cancel()
+
+        # 解析失败或遗漏的条目交给 translate_items 重试
+        missing = [i for i in range(len(lines)) if i not in done]
+        if missing:
+            async for index, result in self.translator.translate_items(
+                [lines[i] for i in missing], self.target_lang, source_lang=self.job_lang, notes=self.notes
+            ):
+                yield missing[index], result
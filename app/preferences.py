@@ -0,0 +1,58 @@
+"""Remembers which target languages the user picks interactively."""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class TargetPreferences:
+    """Per-primary-language counts of interactively chosen target languages."""
+
+    def __init__(self, path: Path, primary_lang: str):
+        self.path = Path(path)
+        self.primary_lang = primary_lang
+        self._data: Dict[str, Dict[str, int]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load pick counts from disk, ignoring a missing or corrupt file."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def save(self) -> None:
+        """Save pick counts to disk."""
+        self.path.parent.mkdir(exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return self._data.get(self.primary_lang, {})
+
+    def record(self, target_lang: str) -> None:
+        """Record one interactive pick and persist it."""
+        counts = self._data.setdefault(self.primary_lang, {})
+        counts[target_lang] = counts.get(target_lang, 0) + 1
+        self.save()
+
+    def most_likely(self, choices: List[str], default: str = None) -> Optional[str]:
+        """Return the most frequently picked target among choices."""
+        picked = {code: count for code, count in self.counts.items() if code in choices}
+        if picked:
+            return max(picked, key=picked.get)
+        return default if default in choices else (choices[0] if choices else None)
+
+    def dominant(self, choices: List[str], min_picks: int = 10, ratio: float = 0.9) -> Optional[str]:
+        """Return a target that is picked nearly every time, if there is one."""
+        total = sum(self.counts.values())
+        if total < min_picks:
+            return None
+        target = self.most_likely(choices)
+        if target and self.counts.get(target, 0) / total >= ratio:
+            return target
+        return None
@@ -0,0 +1,102 @@
+"""Latency and error statistics used by the `auto` provider mode."""
+
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class ProviderStats:
+    """Decaying per-provider record of time to first token and error rate.
+
+    Every sample moves the averages by ``alpha``; on top of that, averages
+    older than ``half_life`` seconds lose weight, so a provider that has not
+    been used for a while looks uncertain and is picked up by exploration.
+    Failed requests never contribute a time to first token; each one is
+    charged ``error_penalty`` seconds instead.
+    """
+
+    def __init__(self, path: Path, alpha: float = 0.3, half_life: float = 6 * 3600,
+                 explore_rate: float = 0.1, error_penalty: float = 10.0):
+        self.path = Path(path)
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.half_life = half_life
+        self.explore_rate = explore_rate
+        self._data: Dict[str, Dict[str, Optional[float]]] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        tmp_path.replace(self.path)
+
+    def record(self, provider: str, ttft: Optional[float], error: bool) -> None:
+        """Fold one request's outcome into the provider's averages and persist."""
+        now = time.time()
+        entry = self._data.get(provider)
+        if error:
+            ttft = None
+        if entry is None:
+            # 首个请求失败时首字耗时仍未知，不能记为 0
+            entry = {"ttft": ttft, "error_rate": 1.0 if error else 0.0, "weight": 0.0}
+        else:
+            entry["weight"] = self._weight(entry, now)
+            if ttft is not None:
+                if entry.get("ttft") is None:
+                    entry["ttft"] = ttft
+                else:
+                    entry["ttft"] += self.alpha * (ttft - entry["ttft"])
+            entry["error_rate"] += self.alpha * ((1.0 if error else 0.0) - entry["error_rate"])
+        entry["weight"] = min(1.0, entry["weight"] + self.alpha)
+        entry["updated"] = now
+        self._data[provider] = entry
+        self.save()
+
+    def _weight(self, entry: Dict[str, float], now: float) -> float:
+        age = max(0.0, now - entry.get("updated", now))
+        return entry.get("weight", 0.0) * 0.5 ** (age / self.half_life)
+
+    def expected_latency(self, provider: str) -> Optional[float]:
+        """Expected time to a usable first token, counting retries after errors.
+
+        Returns None for providers without fresh numbers. A provider that has
+        never succeeded is assumed to take ``error_penalty`` to its first token.
+        """
+        entry = self._data.get(provider)
+        if not entry or self._weight(entry, time.time()) < 0.05:
+            return None
+        ttft = entry.get("ttft")
+        if ttft is None:
+            ttft = self.error_penalty
+        # 每次失败都要等待 error_penalty 后重试，期望失败次数为 p / (1 - p)
+        error_rate = min(entry["error_rate"], 0.95)
+        return ttft + self.error_penalty * error_rate / (1.0 - error_rate)
+
+    def choose(self, providers: List[str]) -> Optional[str]:
+        """Pick the provider with the best expected latency.
+
+        Providers without fresh numbers are tried first; otherwise a random
+        provider is picked with probability ``explore_rate``.
+        """
+        if not providers:
+            return None
+        unknown = [p for p in providers if self.expected_latency(p) is None]
+        if unknown:
+            return random.choice(unknown)
+        if len(providers) > 1 and random.random() < self.explore_rate:
+            return random.choice(providers)
+        return min(providers, key=self.expected_latency)
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {provider: dict(entry) for provider, entry in self._data.items()}
@@ -0,0 +1,92 @@
+"""Record provider streams as cassettes and replay them offline."""
+
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import aclosing
+from pathlib import Path
+from typing import AsyncGenerator, List, Optional
+
+
+CASSETTE_VERSION = 1
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:24]
+
+
+class CassetteStore:
+    """One JSON cassette per prompt hash: the chunks and the delay before each.
+
+    The first delay is the time to first token, the rest are inter-chunk
+    gaps, rounded to milliseconds. Only streams that finish without an
+    error are written, so a cancelled or failed request never replaces a
+    good recording.
+    """
+
+    def __init__(self, directory: Path, speed: float = 1.0):
+        self.directory = Path(directory)
+        self.speed = speed
+
+    def path(self, prompt: str) -> Path:
+        return self.directory / f"{prompt_key(prompt)}.json"
+
+    async def record(
+        self,
+        prompt: str,
+        stream: AsyncGenerator[str, None],
+        provider: str,
+        model: Optional[str]
+    ) -> AsyncGenerator[str, None]:
+        """Pass stream through unchanged while capturing it."""
+        chunks: List[list] = []
+        last = time.perf_counter()
+        async with aclosing(stream):
+            async for chunk in stream:
+                now = time.perf_counter()
+                chunks.append([round(now - last, 3), chunk])
+                last = now
+                yield chunk
+
+        if chunks and not any(text.startswith("❌ Error") for _, text in chunks):
+            try:
+                self.save(prompt, chunks, provider, model)
+            except OSError:
+                pass
+
+    def save(self, prompt: str, chunks: List[list], provider: str, model: Optional[str]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(prompt)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": CASSETTE_VERSION,
+                "provider": provider,
+                "model": model,
+                "recorded_at": time.time(),
+                "chunks": chunks
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        tmp_path.replace(path)
+
+    async def play(self, prompt: str) -> AsyncGenerator[str, None]:
+        """Yield the recorded chunks, sleeping delay / speed before each (no sleep if speed <= 0)."""
+        try:
+            with open(self.path(prompt), 'r', encoding='utf-8') as f:
+                cassette = json.load(f)
+        except (OSError, ValueError):
+            yield f"❌ Error: no recording for this prompt ({prompt_key(prompt)})"
+            return
+
+        # 按累计时间安排每个分块，避免多次 sleep 的误差累积
+        started = time.perf_counter()
+        due = 0.0
+        for delay, chunk in cassette["chunks"]:
+            if self.speed > 0:
+                due += delay / self.speed
+                wait = due - (time.perf_counter() - started)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            else:
+                await asyncio.sleep(0)
+            yield chunk
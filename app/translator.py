@@ -2,13 +2,48 @@
 
 import asyncio
 import json
+import sqlite3
+import threading
+import time
 import httpx
-from typing import Dict, Any, AsyncGenerator, Optional
+from contextlib import aclosing
+from pathlib import Path
+from typing import Dict, Any, AsyncGenerator, List, Optional, Set, Tuple
 from langdetect import detect
 import dashscope
 from openai import AsyncOpenAI
 
+from .classifier import classify_text
 from .config import Config
+from .endpoints import EndpointPool, is_rate_limited
+from .glossary import Glossary, format_terms, load_keys, might_match
+from .history import HistoryStore
+from .memory import TranslationMemory
+from .provider_stats import ProviderStats
+from .replay import CassetteStore
+from .usage import TokenBudget, UsageStore
+from .packing import estimate_tokens, plan_packs, build_pack_prompt, parse_pack_line
+
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+LANG_NAMES = {
+    "en": "English",
+    "zh-cn": "Simplified Chinese",
+    "zh-tw": "Traditional Chinese (Taiwan)",
+    "zh-hk": "Traditional Chinese (Hong Kong)",
+    "zh": "Chinese",
+    "de": "German",
+    "fr": "French",
+    "ja": "Japanese",
+    "es": "Spanish",
+    "ko": "Korean",
+    "nl": "Dutch",
+    "pl": "Polish",
+    "ru": "Russian",
+    "pt": "Portuguese",
+    "ar": "Arabic"
+}
 
 
 class TranslationService:
@@ -18,6 +53,50 @@ class TranslationService:
         self.config = config
         self.model_config = config.get_current_model_config()
         self.provider = config.get("provider", "openai")
+        self.stats = ProviderStats(
+            config.config_dir / "provider_stats.json",
+            explore_rate=config.get("auto.explore_rate", 0.1),
+            half_life=config.get("auto.half_life_hours", 6) * 3600,
+            error_penalty=config.get("auto.error_penalty", 10.0)
+        )
+        # 翻译历史：后台批量写入，支持全文搜索
+        self.history = None
+        if config.get("history.enabled", True):
+            self.history = HistoryStore(config.config_dir / "history.db")
+        # 同一服务商的多个密钥/端点之间做负载均衡
+        self.endpoints = EndpointPool(
+            config.config_dir / "endpoint_usage.json",
+            penalty_half_life=config.get("endpoints.penalty_half_life", 60)
+        )
+        # 录制/回放服务商的流式响应（provider: replay 时离线回放）
+        cassette_dir = config.get("replay.dir")
+        self.cassettes = CassetteStore(
+            Path(cassette_dir).expanduser() if cassette_dir else config.config_dir / "cassettes",
+            speed=config.get("replay.speed", 1.0)
+        )
+        self.record = config.get("replay.record", False)
+        # 记录每个请求的 token 用量，并按预算降级或拒绝请求
+        self.usage = UsageStore(config.config_dir / "usage.db")
+        self.budget = TokenBudget(
+            self.usage,
+            daily_tokens=config.get("budget.daily_tokens"),
+            request_tokens=config.get("budget.request_tokens"),
+            downgrade_at=config.get("budget.downgrade_at", 0.8)
+        )
+        self._glossary: Optional[Glossary] = None
+        self._glossary_loaded = False
+        self._glossary_keys: Optional[Set[str]] = None
+        self.last_route: Dict[str, Any] = {}
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_timings: Dict[str, float] = {}
+
+        # 翻译记忆：保存已完成的翻译，用于相似输入的快速复用
+        self.memory = None
+        if config.get("translation_memory.enabled", True):
+            self.memory = TranslationMemory(
+                config.config_dir / "memory.db",
+                threshold=config.get("translation_memory.threshold", 0.7)
+            )
 
     async def translate_streaming(
         self,
@@ -25,7 +104,37 @@ class TranslationService:
         target_lang: str = None,
         source_lang: str = None
     ) -> AsyncGenerator[str, None]:
-        """Translate text with streaming response."""
+        """Translate text with streaming response.
+
+        Closing this generator (or cancelling the task reading it) closes the
+        provider's HTTP response right away.
+        """
+        async with aclosing(self.translate_sections(text, target_lang, source_lang, two_phase=False)) as sections:
+            async for _, chunk in sections:
+                yield chunk
+
+    async def translate_sections(
+        self,
+        text: str,
+        target_lang: str = None,
+        source_lang: str = None,
+        two_phase: bool = None,
+        persist: bool = True
+    ) -> AsyncGenerator[Tuple[str, str], None]:
+        """Translate text, yielding (section, chunk) pairs.
+
+        Sentences are sent as two concurrent requests when two-phase mode is
+        on: a short translation-only prompt ("translation") and the grammar
+        analysis with examples ("analysis"). Everything else is a single
+        "translation" section.
+
+        The result is written to history and translation memory. If the
+        generator is closed or cancelled before the end, the partial output
+        goes to history marked incomplete and never to translation memory.
+        With persist=False nothing is written (not even a cassette); the
+        result is left in ``last_result`` for the caller to pass to
+        `save_result` if wanted.
+        """
 
         # Auto-detect source language if not provided
         if not source_lang:
@@ -41,59 +150,459 @@ class TranslationService:
         # Determine if input is word, phrase, or sentence
         text_type = self._classify_text(text)
 
-        # Create appropriate prompt
-        prompt = self._create_prompt(text, source_lang, target_lang, text_type)
+        # 按文本类型和长度选择供应商与模型
+        route = self.resolve_route(text, text_type)
+        self.last_route = dict(route)
+        self.last_timings = {}
+
+        if two_phase is None:
+            two_phase = self.config.get("sentence.two_phase", True)
+        brief = route.get("downgraded", False)
+        if brief:
+            # 接近每日预算时只请求简短译文
+            prompts = {"translation": self._create_prompt(text, source_lang, target_lang, "brief")}
+        elif text_type == "sentence" and two_phase:
+            prompts = {
+                "translation": self._create_prompt(text, source_lang, target_lang, "sentence_translation"),
+                "analysis": self._create_prompt(text, source_lang, target_lang, "sentence_analysis")
+            }
+        else:
+            prompts = {"translation": self._create_prompt(text, source_lang, target_lang, text_type)}
+
+        started = time.perf_counter()
+        parts: Dict[str, List[str]] = {section: [] for section in prompts}
+        failed = False
+        completed = False
+        try:
+            async with aclosing(self._stream_sections(prompts, route, record=persist)) as stream:
+                async for section, chunk in stream:
+                    if section == "translation" and not parts["translation"]:
+                        self.last_timings["first_token"] = time.perf_counter() - started
+                    if chunk.startswith("❌ Error"):
+                        failed = True
+                    parts[section].append(chunk)
+                    yield section, chunk
+            completed = True
+        finally:
+            self.last_timings["total"] = time.perf_counter() - started
+            self.last_result = {
+                "record": {
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "provider": route["provider"],
+                    "model": route["model"],
+                    "input": text,
+                    "output": "\n\n".join("".join(chunks) for chunks in parts.values()),
+                    "complete": int(completed)
+                },
+                "failed": failed,
+                "brief": brief
+            }
+            # 被取消或调用方提前停止读取：保存已收到的部分结果，并标记为不完整
+            if persist and not completed:
+                self.save_result(self.last_result)
+
+        if persist:
+            self.save_result(self.last_result)
+
+    def save_result(self, result: Dict[str, Any]) -> None:
+        """Write a `translate_sections` result to history and translation memory.
+
+        Failed lookups are dropped; incomplete or brief results only go to history.
+        """
+        record = result["record"]
+        if result["failed"] or (not record["complete"] and not record["output"].strip()):
+            return
+        # 只有完整且成功的结果才写入翻译记忆
+        if self.memory and record["complete"] and not result["brief"]:
+            try:
+                self.memory.add(record["input"], record["source_lang"], record["target_lang"],
+                                record["output"], record["model"])
+            except Exception:
+                pass
+        if self.history:
+            self.history.add(dict(record))
+
+    async def _stream_sections(
+        self,
+        prompts: Dict[str, str],
+        route: Dict[str, Any],
+        record: bool = True
+    ) -> AsyncGenerator[Tuple[str, str], None]:
+        """Stream several prompts concurrently, tagging chunks with their section."""
+        if len(prompts) == 1:
+            section, prompt = next(iter(prompts.items()))
+            async with aclosing(self._stream_provider(prompt, route, record=record)) as stream:
+                async for chunk in stream:
+                    yield section, chunk
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(section: str, prompt: str) -> None:
+            try:
+                async with aclosing(self._stream_provider(prompt, route, record=record)) as stream:
+                    async for chunk in stream:
+                        await queue.put((section, chunk))
+            except Exception as e:
+                await queue.put((section, f"❌ Error: {str(e)}"))
+            finally:
+                await queue.put((section, None))
+
+        tasks = [asyncio.create_task(pump(section, prompt)) for section, prompt in prompts.items()]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                section, chunk = await queue.get()
+                if chunk is None:
+                    remaining -= 1
+                    continue
+                yield section, chunk
+        finally:
+            for task in tasks:
+                task.cancel()
+            # 等待各请求真正结束，确保上游连接已经关闭
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def lookup_memory(self, text: str, target_lang: str) -> Optional[Dict[str, Any]]:
+        """Find a similar past translation for text, if any."""
+        if not self.memory:
+            return None
+        try:
+            return self.memory.lookup(text, target_lang)
+        except Exception:
+            return None
 
-        # Route to appropriate provider
-        if self.provider == "openai":
-            async for chunk in self._translate_openai(prompt):
-                yield chunk
-        elif self.provider == "dashscope":
-            async for chunk in self._translate_dashscope(prompt):
-                yield chunk
-        elif self.provider == "custom":
-            async for chunk in self._translate_custom(prompt):
+    async def translate_items(
+        self,
+        items: List[str],
+        target_lang: str,
+        source_lang: str = None,
+        max_retries: int = 2,
+        notes: bool = True
+    ) -> AsyncGenerator[Tuple[int, str], None]:
+        """Translate a list of short items, packing many into each request.
+
+        Yields (index, result) pairs as soon as each item's output line has
+        been parsed. Items the model dropped or garbled are retried in new packs;
+        a provider error is returned for its pack's items without retrying.
+        """
+        if not source_lang:
+            try:
+                source_lang = detect(" ".join(items[:20]))
+            except:
+                source_lang = "auto"
+
+        primary_lang = self.config.get("primary_language", "zh-cn")
+        source_name = LANG_NAMES.get(source_lang, source_lang)
+        target_name = LANG_NAMES.get(target_lang, target_lang)
+        primary_name = LANG_NAMES.get(primary_lang, primary_lang)
+        token_budget = self.pack_token_budget()
+        text_type = "word" if all(self._classify_text(item) == "word" for item in items[:50]) else "phrase"
+        route = self.resolve_route(max(items, key=len), text_type)
+        semaphore = asyncio.Semaphore(self.config.get("batch.concurrency", 4))
+
+        pending = list(range(len(items)))
+        for _ in range(max_retries + 1):
+            if not pending:
+                break
+
+            queue: asyncio.Queue = asyncio.Queue()
+            done = set()
+
+            async def run_pack(indices: List[int]) -> None:
+                expected = {i: items[i] for i in indices}
+                prompt = build_pack_prompt(list(expected.items()), source_name, target_name, primary_name, notes)
+                section = self.glossary_section(list(expected.values()), target_lang)
+                if section:
+                    prompt = f"{prompt.rstrip()}\n\n{section}\n"
+                async with semaphore:
+                    async for index, result in self.stream_pack(expected, prompt, route):
+                        if index not in done:
+                            done.add(index)
+                            await queue.put((index, result))
+
+            async def run_all(packs: List[List[int]]) -> None:
+                try:
+                    await asyncio.gather(*(run_pack(pack) for pack in packs), return_exceptions=True)
+                finally:
+                    await queue.put(None)
+
+            packs = [[pending[i] for i in pack] for pack in plan_packs([items[i] for i in pending], token_budget)]
+            runner = asyncio.create_task(run_all(packs))
+            try:
+                while True:
+                    result = await queue.get()
+                    if result is None:
+                        break
+                    yield result
+            finally:
+                if not runner.done():
+                    runner.cancel()
+
+            pending = [i for i in pending if i not in done]
+
+        for index in pending:
+            yield index, "❌ Error: no result returned for this item"
+
+    def pack_token_budget(self) -> int:
+        """Token budget per pack, kept within the per-request budget if one is set."""
+        token_budget = self.config.get("batch.token_budget", 3000)
+        if self.budget.request_tokens:
+            token_budget = min(token_budget, self.budget.request_tokens)
+        return token_budget
+
+    async def stream_pack(
+        self,
+        expected: Dict[int, str],
+        prompt: str,
+        route: Dict[str, Any] = None
+    ) -> AsyncGenerator[Tuple[int, str], None]:
+        """Send one packed prompt and yield (id, result) for each parsed output line.
+
+        A provider error (auth failure, budget refusal, ...) is yielded as the
+        result of every item not parsed yet, so callers report it instead of
+        retrying the pack.
+        """
+        seen = set()
+        buffer = ""
+        async with aclosing(self._stream_provider(prompt, route)) as stream:
+            async for chunk in stream:
+                if chunk.startswith("❌ Error"):
+                    for index in expected:
+                        if index not in seen:
+                            yield index, chunk
+                    return
+                buffer += chunk
+                # 按行解析，每解析出一个条目就立即交给调用方
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    parsed = parse_pack_line(line, expected)
+                    if parsed and parsed[0] not in seen:
+                        seen.add(parsed[0])
+                        yield parsed
+        parsed = parse_pack_line(buffer, expected)
+        if parsed and parsed[0] not in seen:
+            yield parsed
+
+    def resolve_route(self, text: str, text_type: str) -> Dict[str, Any]:
+        """Pick the provider and model for a request from the `routes` config.
+
+        Rules are checked in order; a rule matches when its optional
+        `text_type`, `min_length` and `max_length` all fit the input. The
+        first match wins, otherwise the default provider/model is used.
+        """
+        length = len(text.strip())
+        for index, rule in enumerate(self.config.get("routes", None) or []):
+            if rule.get("text_type") and rule["text_type"] != text_type:
+                continue
+            if rule.get("min_length") is not None and length < rule["min_length"]:
+                continue
+            if rule.get("max_length") is not None and length > rule["max_length"]:
+                continue
+
+            provider = rule.get("provider", self.provider)
+            if provider == "auto":
+                provider = self._choose_provider()
+            model_config = dict(self.config.get(f"models.{provider}", {}))
+            if rule.get("model"):
+                model_config["model"] = rule["model"]
+            return self._apply_budget({
+                "name": rule.get("name", f"routes[{index}]"),
+                "provider": provider,
+                "model": model_config.get("model"),
+                "model_config": model_config,
+                "text_type": text_type
+            })
+
+        return self._apply_budget(dict(self._default_route(), text_type=text_type))
+
+    def _apply_budget(self, route: Dict[str, Any]) -> Dict[str, Any]:
+        """Switch to the cheaper model configured for the provider once the daily budget runs low."""
+        if not self.budget.downgraded():
+            return route
+        route = dict(route, downgraded=True)
+        cheaper = (self.config.get("budget.downgrade_models", {}) or {}).get(route["provider"])
+        if cheaper:
+            route["model_config"] = dict(route["model_config"], model=cheaper)
+            route["model"] = cheaper
+        return route
+
+    def _default_route(self) -> Dict[str, Any]:
+        if self.provider == "auto":
+            provider = self._choose_provider()
+            model_config = self.config.get(f"models.{provider}", {})
+            return {
+                "name": "auto",
+                "provider": provider,
+                "model": model_config.get("model"),
+                "model_config": model_config
+            }
+        return {
+            "name": "default",
+            "provider": self.provider,
+            "model": self.model_config.get("model"),
+            "model_config": self.model_config
+        }
+
+    def _choose_provider(self) -> str:
+        """Pick a configured provider from recent latency and error statistics."""
+        return self.stats.choose(self.config.configured_providers()) or "openai"
+
+    async def _stream_provider(self, prompt: str, route: Dict[str, Any] = None,
+                               record: bool = True) -> AsyncGenerator[str, None]:
+        """Send the prompt to the provider chosen by route (default provider if None).
+
+        With record=False the response is never saved as a cassette, even
+        when recording is on.
+        """
+        if route is None:
+            route = self._default_route()
+        provider = route["provider"]
+        model_config = route["model_config"]
+
+        if provider == "replay":
+            async for chunk in self.cassettes.play(prompt):
                 yield chunk
+            return
+
+        providers = {
+            "openai": self._translate_openai,
+            "dashscope": self._translate_dashscope,
+            "custom": self._translate_custom
+        }
+        if provider not in providers:
+            return
+
+        # 预算检查：超出时拒绝请求，否则按剩余预算限制输出长度
+        prompt_tokens = estimate_tokens(prompt)
+        refusal = self.budget.check(prompt_tokens)
+        if refusal:
+            yield f"❌ Error: {refusal}"
+            return
+        max_tokens = self.budget.max_completion(prompt_tokens)
+
+        # 记录首字耗时和错误，供 auto 模式选择服务商
+        started = time.perf_counter()
+        ttft = None
+        error = False
+        endpoints = self.endpoints.endpoints(provider, model_config)
+        tried = []
+        while True:
+            endpoint = self.endpoints.choose(endpoints, exclude=tried)
+            tried.append(endpoint)
+            self.endpoints.acquire(endpoint)
+            endpoint_error = rate_limited = False
+            retry = False
+            usage: Dict[str, int] = {}
+            output: List[str] = []
+            request_config = endpoint.request_config(model_config)
+            stream = providers[provider](prompt, request_config, endpoint=endpoint, usage=usage, max_tokens=max_tokens)
+            if self.record and record:
+                stream = self.cassettes.record(prompt, stream, provider, request_config.get("model"))
+            try:
+                async for chunk in stream:
+                    if chunk.startswith("❌ Error"):
+                        endpoint_error = True
+                        rate_limited = is_rate_limited(chunk)
+                        if ttft is None and rate_limited and len(tried) < len(endpoints):
+                            # 还没有输出内容时被限流，换一个端点重试
+                            retry = True
+                            break
+                    else:
+                        output.append(chunk)
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    yield chunk
+            finally:
+                await stream.aclose()
+                self.endpoints.release(endpoint, error=endpoint_error, rate_limited=rate_limited)
+                self._record_usage(route, request_config.get("model"), prompt_tokens, usage, output)
+            if not retry:
+                error = endpoint_error
+                break
+
+        try:
+            self.stats.record(provider, None if error else ttft, error or ttft is None)
+        except OSError:
+            pass
+
+    def _record_usage(self, route: Dict[str, Any], model: Optional[str], prompt_tokens: int,
+                      usage: Dict[str, int], output: List[str]) -> None:
+        """Store reported token counts, or estimates when the provider sent none."""
+        if not usage and not output:
+            return
+        estimated = "completion_tokens" not in usage
+        try:
+            self.usage.record(
+                route["provider"],
+                model,
+                route.get("text_type"),
+                usage.get("prompt_tokens", prompt_tokens),
+                usage.get("completion_tokens", estimate_tokens("".join(output)) if output else 0),
+                estimated
+            )
+        except sqlite3.Error:
+            pass
 
     def _classify_text(self, text: str) -> str:
         """Classify text as word, phrase, or sentence."""
-        text = text.strip()
-
-        # Simple classification logic
-        if len(text.split()) == 1 and text.isalpha():
-            return "word"
-        elif len(text.split()) <= 5 and not any(p in text for p in '.!?'):
-            return "phrase"
-        else:
-            return "sentence"
+        return classify_text(text)
+
+    @property
+    def glossary(self) -> Optional[Glossary]:
+        """The imported glossary, loaded on first use (None if there is none)."""
+        if not self._glossary_loaded:
+            self._glossary_loaded = True
+            if self.config.get("glossary.enabled", True):
+                self._glossary = Glossary.load(self.config.config_dir)
+        return self._glossary
+
+    def glossary_section(self, texts: List[str], target_lang: str) -> str:
+        """Prompt lines for the glossary terms that occur in texts.
+
+        The automaton is only loaded once the glossary's small key set shows
+        that one of the texts may contain a term.
+        """
+        keys = self._glossary_key_set()
+        if not keys or not any(might_match(keys, text) for text in texts):
+            return ""
+        if self.glossary is None:
+            return ""
+        terms = self.glossary.terms_for(texts, target_lang, limit=self.config.get("glossary.max_terms", 50))
+        return format_terms(terms)
+
+    def _glossary_key_set(self) -> Set[str]:
+        if self._glossary_keys is None:
+            keys = load_keys(self.config.config_dir) if self.config.get("glossary.enabled", True) else set()
+            if keys is None:
+                # 旧版本保存的术语表没有键文件：加载一次完整术语表并补写
+                keys = self.glossary.keys() if self.glossary is not None else set()
+                if keys:
+                    try:
+                        self.glossary.save_keys(self.config.config_dir)
+                    except OSError:
+                        pass
+            self._glossary_keys = keys
+        return self._glossary_keys
 
     def _create_prompt(self, text: str, source_lang: str, target_lang: str, text_type: str) -> str:
         """Create appropriate prompt based on text type."""
+        prompt = self._template_prompt(text, source_lang, target_lang, text_type)
+        # 只加入输入中实际出现的术语
+        section = self.glossary_section([text], target_lang)
+        if section:
+            prompt = f"{prompt.rstrip()}\n\n{section}\n"
+        return prompt
+
+    def _template_prompt(self, text: str, source_lang: str, target_lang: str, text_type: str) -> str:
 
         # 获取用户配置的主语言
         primary_lang = self.config.get("primary_language", "zh-cn")
 
-        lang_names = {
-            "en": "English",
-            "zh-cn": "Simplified Chinese",
-            "zh-tw": "Traditional Chinese (Taiwan)",
-            "zh-hk": "Traditional Chinese (Hong Kong)",
-            "zh": "Chinese",
-            "de": "German",
-            "fr": "French",
-            "ja": "Japanese",
-            "es": "Spanish",
-            "ko": "Korean",
-            "nl": "Dutch",
-            "pl": "Polish",
-            "ru": "Russian",
-            "pt": "Portuguese",
-            "ar": "Arabic"
-        }
-
-        source_name = lang_names.get(source_lang, source_lang)
-        target_name = lang_names.get(target_lang, target_lang)
-        primary_name = lang_names.get(primary_lang, primary_lang)
+        source_name = LANG_NAMES.get(source_lang, source_lang)
+        target_name = LANG_NAMES.get(target_lang, target_lang)
+        primary_name = LANG_NAMES.get(primary_lang, primary_lang)
 
         if text_type == "word":
             return f"""
@@ -123,6 +632,39 @@ class TranslationService:
             4. 如果有多个含义，请列出所有常见含义并提供对应的翻译和用法，并且其他用法也要遵循之前的输出格式。
             """
 
+        elif text_type == "sentence_translation":
+            return f"""
+            将句子 "{text}" 从 {source_name} 翻译到 {target_name}。
+
+            要求：
+            1. 只输出准确、自然的译文本身；
+            2. 不要输出语法分析、解释或示例，这些内容会单独生成；
+            3. 输出内容不要用markdown格式
+            """
+
+        elif text_type == "brief":
+            return f"""
+            将 "{text}" 从 {source_name} 翻译到 {target_name}。
+
+            要求：
+            1. 只输出译文；如果是单词或短语，可以在译文后用一行{primary_name}给出最简短的释义；
+            2. 不要输出例句、读音、语法分析或其他说明；
+            3. 输出内容不要用markdown格式
+            """
+
+        elif text_type == "sentence_analysis":
+            return f"""
+            句子 "{text}" 是 {source_name}，将被翻译为 {target_name}（译文会单独给出，这里不要重复整句翻译）。输出以下内容：
+            对原句内容做语法分析，并展示一些使用示例
+
+            要求：
+            1. 输出的内容要适合在命令行中展示并且要美观，适当的可以加入一些表情符号或者颜色；
+            2. 说明性的内容使用{primary_name}语言回复。
+            3. 输出内容不要用markdown格式
+            4. 不要包含代码块或其他格式化内容
+            5. 语法分析要准确且格式清晰
+            """
+
         else:  # sentence
             return f"""
             将句子 "{text}" 从 {source_name} 翻译到 {target_name}。输出以下内容：
@@ -136,50 +678,119 @@ class TranslationService:
             5. 语法分析要准确且格式清晰
             """
 
-    async def _translate_openai(self, prompt: str) -> AsyncGenerator[str, None]:
-        """Translate using OpenAI API."""
-        client = AsyncOpenAI(
-            api_key=self.model_config.get("api_key"),
-            base_url=self.model_config.get(
-                "base_url", "https://api.openai.com/v1")
+    @staticmethod
+    def _openai_client(model_config: Dict[str, Any]) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key=model_config.get("api_key"),
+            base_url=model_config.get("base_url", OPENAI_BASE_URL)
         )
 
+    @staticmethod
+    def _openai_stream_usage(model_config: Dict[str, Any]) -> bool:
+        """Whether to ask for usage in the stream (`stream_usage`, default: official API only)."""
+        setting = model_config.get("stream_usage")
+        if setting is not None:
+            return bool(setting)
+        # 指向第三方 OpenAI 兼容服务时不一定支持 stream_options，默认不发送，用量按字数估算
+        return (model_config.get("base_url") or OPENAI_BASE_URL).rstrip("/") == OPENAI_BASE_URL
+
+    async def _translate_openai(self, prompt: str, model_config: Dict[str, Any], endpoint=None,
+                                usage: Dict[str, int] = None, max_tokens: int = None) -> AsyncGenerator[str, None]:
+        """Translate using OpenAI API."""
+        if endpoint is not None:
+            client = endpoint.client(self._openai_client)
+        else:
+            client = self._openai_client(model_config)
+
+        stream = None
         try:
             stream = await client.chat.completions.create(
-                model=self.model_config.get("model", "gpt-3.5-turbo"),
+                model=model_config.get("model", "gpt-3.5-turbo"),
                 messages=[
                     {"role": "system", "content": "You are a professional translator and language teacher. Provide detailed, accurate translations with educational context."},
                     {"role": "user", "content": prompt}
                 ],
                 stream=True,
-                temperature=0.3
+                temperature=0.3,
+                **({"max_tokens": max_tokens} if max_tokens else {}),
+                # 最后一个分块携带本次请求的 token 用量
+                **({"stream_options": {"include_usage": True}} if self._openai_stream_usage(model_config) else {})
             )
 
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
+                if chunk.usage and usage is not None:
+                    usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                    usage["completion_tokens"] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
 
         except Exception as e:
             yield f"❌ Error: {str(e)}"
+        finally:
+            # 提前结束（取消或调用方停止读取）时关闭 HTTP 响应，服务端随即停止生成
+            if stream is not None:
+                await stream.close()
+
+    async def _translate_dashscope(self, prompt: str, model_config: Dict[str, Any], endpoint=None,
+                                   usage: Dict[str, int] = None, max_tokens: int = None) -> AsyncGenerator[str, None]:
+        """Translate using DashScope API.
+
+        The SDK returns a blocking iterator, so it is read on a background
+        thread. When this generator is closed the thread stops at the next
+        chunk and closes the iterator, which closes the HTTP response.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # 事件循环已关闭
 
-    async def _translate_dashscope(self, prompt: str) -> AsyncGenerator[str, None]:
-        """Translate using DashScope API."""
-        dashscope.api_key = self.model_config.get("api_key")
+        def read() -> None:
+            responses = None
+            try:
+                # 按请求传入密钥，多个密钥并发使用时互不影响
+                responses = dashscope.Generation.call(
+                    api_key=model_config.get("api_key"),
+                    model=model_config.get("model", "qwen-turbo"),
+                    messages=[
+                        {"role": "system", "content": "You are a professional translator and language teacher. Provide detailed, accurate translations with educational context."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True,
+                    result_format='message',
+                    **({"max_tokens": max_tokens} if max_tokens else {})
+                )
+                for response in responses:
+                    if stop.is_set():
+                        break
+                    put(response)
+            except Exception as e:
+                put(e)
+            finally:
+                if hasattr(responses, "close"):
+                    responses.close()
+                put(None)
 
-        try:
-            responses = dashscope.Generation.call(
-                model=self.model_config.get("model", "qwen-turbo"),
-                messages=[
-                    {"role": "system", "content": "You are a professional translator and language teacher. Provide detailed, accurate translations with educational context."},
-                    {"role": "user", "content": prompt}
-                ],
-                stream=True,
-                result_format='message'
-            )
+        threading.Thread(target=read, name="lu-dashscope", daemon=True).start()
 
-            previous_content = ""
-            for response in responses:
+        previous_content = ""
+        try:
+            while True:
+                response = await queue.get()
+                if response is None:
+                    break
+                if isinstance(response, Exception):
+                    yield f"❌ Error: {str(response)}"
+                    break
                 if response.status_code == 200:
+                    # usage 中是截至当前分块的累计值
+                    if response.usage and usage is not None:
+                        usage["prompt_tokens"] = response.usage["input_tokens"]
+                        usage["completion_tokens"] = response.usage["output_tokens"]
                     current_content = response.output.choices[0]['message']['content']
                     # 只yield新增的内容部分
                     if current_content and current_content != previous_content:
@@ -188,43 +799,70 @@ class TranslationService:
                             yield delta
                         previous_content = current_content
                 else:
-                    yield f"❌ Error: {response.message}"
-
-        except Exception as e:
-            yield f"❌ Error: {str(e)}"
+                    yield f"❌ Error: {response.status_code} {response.message}"
+        finally:
+            stop.set()
 
-    async def _translate_custom(self, prompt: str) -> AsyncGenerator[str, None]:
+    async def _translate_custom(self, prompt: str, model_config: Dict[str, Any], endpoint=None,
+                                usage: Dict[str, int] = None, max_tokens: int = None) -> AsyncGenerator[str, None]:
         """Translate using custom OpenAI-compatible API."""
+        if endpoint is not None:
+            # 端点自己的连接池，在请求之间复用
+            client = endpoint.client(lambda _: httpx.AsyncClient())
+            async with aclosing(self._stream_custom(client, prompt, model_config, usage, max_tokens)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
         async with httpx.AsyncClient() as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    f"{self.model_config.get('base_url')}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.model_config.get('api_key')}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model_config.get("model", "gpt-3.5-turbo"),
-                        "messages": [
-                            {"role": "system", "content": "You are a professional translator and language teacher. Provide detailed, accurate translations with educational context."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": True,
-                        "temperature": 0.3
-                    }
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data)
-                                if chunk["choices"][0]["delta"].get("content"):
-                                    yield chunk["choices"][0]["delta"]["content"]
-                            except:
-                                continue
+            async with aclosing(self._stream_custom(client, prompt, model_config, usage, max_tokens)) as stream:
+                async for chunk in stream:
+                    yield chunk
+
+    async def _stream_custom(self, client: httpx.AsyncClient, prompt: str, model_config: Dict[str, Any],
+                             usage: Dict[str, int] = None, max_tokens: int = None) -> AsyncGenerator[str, None]:
+        body = {
+            "model": model_config.get("model", "gpt-3.5-turbo"),
+            "messages": [
+                {"role": "system", "content": "You are a professional translator and language teacher. Provide detailed, accurate translations with educational context."},
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True,
+            "temperature": 0.3
+        }
+        if max_tokens:
+            body["max_tokens"] = max_tokens
+        # 并非所有兼容服务都支持 stream_options，需要在配置中开启
+        if model_config.get("stream_usage"):
+            body["stream_options"] = {"include_usage": True}
+        try:
+            async with client.stream(
+                "POST",
+                f"{model_config.get('base_url')}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {model_config.get('api_key')}",
+                    "Content-Type": "application/json"
+                },
+                json=body
+            ) as response:
+                if response.status_code >= 400:
+                    yield f"❌ Error: HTTP {response.status_code}"
+                    return
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data = line[6:]
+                        if data == "[DONE]":
+                            break
+                        # 不能用裸 except：取消时 yield 处抛出的 GeneratorExit 会被吞掉
+                        try:
+                            chunk = json.loads(data)
+                            if chunk.get("usage") and usage is not None:
+                                usage["prompt_tokens"] = chunk["usage"]["prompt_tokens"]
+                                usage["completion_tokens"] = chunk["usage"]["completion_tokens"]
+                            content = chunk["choices"][0]["delta"].get("content")
+                        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                            continue
+                        if content:
+                            yield content
 
-            except Exception as e:
-                yield f"❌ Error: {str(e)}"
+        except Exception as e:
+            yield f"❌ Error: {str(e)}"
@@ -0,0 +1,156 @@
+"""Token usage accounting and budgets for lookup-cli."""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    provider TEXT,
+    model TEXT,
+    text_type TEXT,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    estimated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_usage_created ON usage (created_at);
+"""
+
+GROUPS = {
+    "day": ["day", "provider", "model"],
+    "model": ["provider", "model"],
+    "type": ["text_type"]
+}
+
+
+def start_of_day(now: float = None) -> float:
+    today = datetime.fromtimestamp(now if now is not None else time.time())
+    return today.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class UsageStore:
+    """SQLite log of prompt/completion tokens per request.
+
+    Today's total is cached and refreshed from the database every
+    ``refresh_interval`` seconds, so budget checks stay cheap while still
+    seeing usage from other lu processes.
+    """
+
+    def __init__(self, db_path: Path, refresh_interval: float = 5.0):
+        self.db_path = Path(db_path)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._today = (0.0, 0)
+        self._refreshed = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, provider: str, model: Optional[str], text_type: Optional[str],
+               prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO usage (created_at, provider, model, text_type, prompt_tokens, completion_tokens, estimated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (now, provider, model, text_type, prompt_tokens, completion_tokens, int(estimated))
+                )
+            day, total = self._today
+            if day == start_of_day(now):
+                self._today = (day, total + prompt_tokens + completion_tokens)
+
+    def used_today(self) -> int:
+        """Tokens used since local midnight, across all processes."""
+        now = time.time()
+        day = start_of_day(now)
+        with self._lock:
+            if self._today[0] != day or now - self._refreshed > self.refresh_interval:
+                if not self.db_path.exists():
+                    return 0
+                row = self._connect().execute(
+                    "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM usage WHERE created_at >= ?",
+                    (day,)
+                ).fetchone()
+                self._today = (day, row[0])
+                self._refreshed = now
+            return self._today[1]
+
+    def report(self, since: float, group_by: str = "day") -> List[Dict[str, Any]]:
+        """Aggregate usage since a timestamp by day/model, model or text type."""
+        if not self.db_path.exists():
+            return []
+        columns = GROUPS[group_by]
+        select = ", ".join(
+            "date(created_at, 'unixepoch', 'localtime') AS day" if c == "day" else c for c in columns
+        )
+        sql = (
+            f"SELECT {select}, COUNT(*) AS requests, SUM(prompt_tokens) AS prompt_tokens, "
+            f"SUM(completion_tokens) AS completion_tokens, SUM(estimated) AS estimated "
+            f"FROM usage WHERE created_at >= ? GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+        )
+        with self._lock:
+            rows = self._connect().execute(sql, (since,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TokenBudget:
+    """Daily and per-request token limits.
+
+    Past ``downgrade_at`` of the daily budget the translator switches to
+    brief prompts and the configured cheaper models; once the daily budget
+    is used up, or a prompt alone exceeds the per-request budget, requests
+    are refused. The per-request budget also caps the completion length.
+    """
+
+    def __init__(self, store: UsageStore, daily_tokens: int = None, request_tokens: int = None,
+                 downgrade_at: float = 0.8):
+        self.store = store
+        self.daily_tokens = daily_tokens
+        self.request_tokens = request_tokens
+        self.downgrade_at = downgrade_at
+
+    def downgraded(self) -> bool:
+        if not self.daily_tokens:
+            return False
+        return self.store.used_today() >= self.daily_tokens * self.downgrade_at
+
+    def check(self, prompt_tokens: int) -> Optional[str]:
+        """Return why a request of this size must be refused, or None."""
+        if self.request_tokens and prompt_tokens >= self.request_tokens:
+            return f"prompt needs ~{prompt_tokens} tokens, per-request budget is {self.request_tokens}"
+        if self.daily_tokens:
+            used = self.store.used_today()
+            if used + prompt_tokens >= self.daily_tokens:
+                return f"daily token budget exhausted ({used}/{self.daily_tokens})"
+        return None
+
+    def max_completion(self, prompt_tokens: int) -> Optional[int]:
+        """Completion token cap left by the per-request and daily budgets."""
+        limits = []
+        if self.request_tokens:
+            limits.append(self.request_tokens - prompt_tokens)
+        if self.daily_tokens:
+            limits.append(self.daily_tokens - self.store.used_today() - prompt_tokens)
+        return max(1, min(limits)) if limits else None
@@ -0,0 +1,277 @@
+"""Follow a growing file or stream and translate new lines."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .translator import TranslationService
+
+
+# 每次从文件读取的最大字节数，避免一次性读入巨大的积压内容
+READ_CHUNK_SIZE = 1 << 20
+
+
+class Checkpoint:
+    """Byte offset of the last translated line of a watched file.
+
+    Lines whose translation failed are kept as (start, end) byte ranges in
+    ``failed``, so the offset can keep moving past them.
+    """
+
+    def __init__(self, checkpoint_dir: Path, path: Path):
+        self.path = Path(path).resolve()
+        digest = hashlib.sha1(str(self.path).encode()).hexdigest()[:16]
+        self.file = Path(checkpoint_dir) / f"{digest}.json"
+        self.failed: List[Tuple[int, int]] = []
+
+    def load(self) -> Optional[int]:
+        """Return the saved offset if it still applies to the same file (also loads ``failed``)."""
+        self.failed = []
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            stat = self.path.stat()
+        except (OSError, ValueError):
+            return None
+        # 文件被替换或截断时不再沿用旧的偏移量
+        if data.get("inode") != stat.st_ino or data.get("offset", 0) > stat.st_size:
+            return None
+        self.failed = [(start, end) for start, end in data.get("failed", []) if end <= stat.st_size]
+        return data.get("offset", 0)
+
+    def save(self, offset: int, failed: List[Tuple[int, int]] = ()) -> None:
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"path": str(self.path), "inode": self.path.stat().st_ino, "offset": offset,
+                       "failed": [list(span) for span in failed]}, f)
+        tmp_file.replace(self.file)
+
+
+class WatchSession:
+    """Translates lines appended to a file (or read from stdin) as they arrive.
+
+    Lines that arrive within ``window`` seconds of each other are grouped into
+    one packed request. At most ``2 * concurrency`` groups may be read ahead
+    of the output, so a fast producer is throttled instead of growing memory.
+    Results are emitted in input order, and the checkpoint only advances past
+    lines whose translation has been emitted. A line the provider fails on is
+    retried ``retries`` times with growing delays; if it still fails it is
+    passed to ``on_error`` and its byte range is stored in the checkpoint,
+    which keeps advancing. A restart translates those lines first.
+    """
+
+    def __init__(
+        self,
+        translator: TranslationService,
+        target_lang: str,
+        emit: Callable[[str, str], None],
+        on_error: Optional[Callable[[str, str], None]] = None,
+        path: Optional[Path] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        window: float = 0.5,
+        max_lines: int = 20,
+        concurrency: int = 2,
+        from_start: bool = False,
+        poll_interval: float = 0.2,
+        retries: int = 2,
+        retry_delay: float = 1.0
+    ):
+        self.translator = translator
+        self.target_lang = target_lang
+        self.emit = emit
+        self.on_error = on_error
+        self.path = path
+        self.checkpoint = checkpoint
+        self.window = window
+        self.max_lines = max_lines
+        self.concurrency = concurrency
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self._lines: asyncio.Queue = asyncio.Queue(maxsize=max_lines * 4)
+        self._groups: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(concurrency * 2)
+        self._results: Dict[int, Tuple[List[str], List[str], List[Optional[Tuple[int, int]]]]] = {}
+        self._next_emit = 0
+        # 检查点：已处理到的偏移量，以及最终翻译失败的行（重启后优先重试）
+        self._done_offset: Optional[int] = None
+        self._failed: Set[Tuple[int, int]] = set()
+
+    async def run(self) -> None:
+        """Run until the input ends (stdin) or the task is cancelled."""
+        reader = asyncio.create_task(self._read_stdin() if self.path is None else self._follow_file())
+        grouper = asyncio.create_task(self._group_lines())
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await reader
+            await grouper
+            for _ in workers:
+                await self._groups.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in [reader, grouper, *workers]:
+                task.cancel()
+
+    async def _follow_file(self) -> None:
+        offset = self.checkpoint.load() if self.checkpoint else None
+        if offset is None:
+            offset = 0 if self.from_start else os.path.getsize(self.path)
+        else:
+            # 上次翻译失败的行先重新翻译
+            self._done_offset = offset
+            self._failed = set(self.checkpoint.failed)
+            with open(self.path, 'rb') as f:
+                for start, end in sorted(self._failed):
+                    f.seek(start)
+                    line = f.read(end - start).rstrip(b"\n").rstrip(b"\r")
+                    await self._lines.put((line.decode('utf-8', errors='replace'), (start, end)))
+
+        partial = b""
+        while True:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = offset
+            if size < offset:
+                # 文件被截断（例如日志轮转），从头开始
+                offset, partial = 0, b""
+                self._done_offset = None
+                self._failed.clear()
+            if size == offset:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            # line_end 是每一行（含换行符）结束处的字节偏移量，用作检查点
+            line_end = offset - len(partial)
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read(min(size - offset, READ_CHUNK_SIZE))
+            offset += len(chunk)
+            data = partial + chunk
+            *complete, partial = data.split(b"\n")
+            for line in complete:
+                line_start = line_end
+                line_end += len(line) + 1
+                await self._lines.put((line.rstrip(b"\r").decode('utf-8', errors='replace'), (line_start, line_end)))
+
+    async def _read_stdin(self) -> None:
+        # 用 add_reader 等待 stdin 可读：线程池里阻塞的 readline 无法取消，Ctrl-C 后会一直等到输入关闭
+        loop = asyncio.get_running_loop()
+        fd = sys.stdin.fileno()
+        readable = asyncio.Event()
+        try:
+            loop.add_reader(fd, readable.set)
+        except (NotImplementedError, OSError, ValueError):
+            # Windows 或 stdin 重定向自普通文件：readline 不会长时间阻塞
+            while True:
+                line = await loop.run_in_executor(None, sys.stdin.buffer.readline)
+                if not line:
+                    break
+                await self._lines.put((line.rstrip(b"\r\n").decode('utf-8', errors='replace'), None))
+            await self._lines.put(None)
+            return
+
+        partial = b""
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                try:
+                    data = os.read(fd, READ_CHUNK_SIZE)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    break
+                *complete, partial = (partial + data).split(b"\n")
+                for line in complete:
+                    await self._lines.put((line.rstrip(b"\r").decode('utf-8', errors='replace'), None))
+        finally:
+            loop.remove_reader(fd)
+        if partial:
+            await self._lines.put((partial.rstrip(b"\r").decode('utf-8', errors='replace'), None))
+        await self._lines.put(None)
+
+    async def _group_lines(self) -> None:
+        loop = asyncio.get_running_loop()
+        sequence = 0
+        lines: List[str] = []
+        spans: List[Optional[Tuple[int, int]]] = []
+        deadline = 0.0
+
+        async def flush():
+            nonlocal sequence, lines, spans
+            if lines:
+                # 在途分组达到上限时在这里等待，形成背压
+                await self._slots.acquire()
+                await self._groups.put((sequence, lines, spans))
+                sequence += 1
+                lines, spans = [], []
+
+        while True:
+            timeout = max(0.0, deadline - loop.time()) if lines else None
+            try:
+                item = await asyncio.wait_for(self._lines.get(), timeout)
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            if item is None:
+                await flush()
+                return
+
+            line, span = item
+            if not lines:
+                deadline = loop.time() + self.window
+            lines.append(line)
+            spans.append(span)
+            if len(lines) >= self.max_lines:
+                await flush()
+
+    async def _worker(self) -> None:
+        while True:
+            group = await self._groups.get()
+            if group is None:
+                return
+            sequence, lines, spans = group
+
+            translations = [""] * len(lines)
+            todo = [i for i, line in enumerate(lines) if line.strip()]
+            for attempt in range(self.retries + 1):
+                if not todo:
+                    break
+                if attempt:
+                    # 临时错误（如 500、限流）稍等后只重试失败的行
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                items = [lines[i] for i in todo]
+                async for index, result in self.translator.translate_items(items, self.target_lang, notes=False):
+                    translations[todo[index]] = result
+                todo = [i for i in todo if translations[i].startswith("❌ Error")]
+
+            self._results[sequence] = (lines, translations, spans)
+            self._emit_ready()
+
+    def _emit_ready(self) -> None:
+        while self._next_emit in self._results:
+            lines, translations, spans = self._results.pop(self._next_emit)
+            for line, translation, span in zip(lines, translations, spans):
+                if span is not None:
+                    self._done_offset = max(self._done_offset or 0, span[1])
+                if translation.startswith("❌ Error"):
+                    if span is not None:
+                        self._failed.add(span)
+                    if self.on_error:
+                        self.on_error(line, translation)
+                    continue
+                self.emit(line, translation)
+                if span is not None:
+                    self._failed.discard(span)
+            if self.checkpoint and self._done_offset is not None:
+                self.checkpoint.save(self._done_offset, sorted(self._failed))
+            self._next_emit += 1
+            self._slots.release()
@@ -0,0 +1,57 @@
+"""Measure how fast cancellation reaches the provider connection.
+
+Starts a local mock of an OpenAI-compatible streaming endpoint that sends
+a token every few milliseconds for as long as the client listens. For the
+`openai` and `custom` providers the script reads a few chunks, then either
+closes the translate_streaming generator or cancels the task reading it,
+and reports how long the mock server took to see the connection close.
+Runs in a temporary home directory and sends nothing over the network.
+tests/test_cancel.py runs the same scenarios with a fixed latency bound.
+
+    python benchmarks/bench_cancel.py --runs 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+# 模拟服务和取消逻辑与 tests/test_cancel.py 共用
+from test_cancel import MockServer, cancel_once
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--after", type=int, default=5, help="Chunks to read before cancelling")
+    args = parser.parse_args()
+
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="lu-bench-")
+    from app.config import Config
+    from app.translator import TranslationService
+
+    server = MockServer()
+    print(f"{'provider':>9} {'how':>7} {'median ms':>10} {'max ms':>8}")
+    failed = False
+    for provider in ("openai", "custom"):
+        config = Config()
+        config.set("provider", provider)
+        config.set(f"models.{provider}", {"api_key": "mock", "model": "mock", "base_url": server.base_url})
+        config.set("translation_memory.enabled", False)
+        translator = TranslationService(config)
+        for how in ("close", "cancel"):
+            delays = [asyncio.run(cancel_once(translator, server, how, args.after)) for _ in range(args.runs)]
+            failed = failed or any(d == float("inf") for d in delays)
+            print(f"{provider:>9} {how:>7} {statistics.median(delays) * 1000:>10.1f} {max(delays) * 1000:>8.1f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
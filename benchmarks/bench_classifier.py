@@ -0,0 +1,69 @@
+"""Check the text classifier against the labelled cases and time it.
+
+Cases live in classifier_cases.tsv (language, expected type, text) and
+cover every supported language. Prints per-language accuracy, every
+misclassified case and the cost per call; exits with status 1 on any
+mismatch.
+
+    python benchmarks/bench_classifier.py
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.classifier import classify_text
+
+
+CASES_FILE = Path(__file__).resolve().parent / "classifier_cases.tsv"
+
+
+def load_cases(path: Path):
+    cases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                lang, expected, text = line.rstrip("\n").split("\t", 2)
+                cases.append((lang, expected, text))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200, help="Timing rounds over all cases")
+    args = parser.parse_args()
+
+    cases = load_cases(CASES_FILE)
+    totals = defaultdict(lambda: [0, 0])
+    failures = []
+    for lang, expected, text in cases:
+        got = classify_text(text)
+        totals[lang][1] += 1
+        if got == expected:
+            totals[lang][0] += 1
+        else:
+            failures.append((lang, expected, got, text))
+
+    print(f"{'lang':>6} {'correct':>8}")
+    for lang, (correct, total) in totals.items():
+        print(f"{lang:>6} {correct:>4}/{total:<3}")
+    for lang, expected, got, text in failures:
+        print(f"MISMATCH [{lang}] expected {expected}, got {got}: {text}")
+
+    texts = [text for _, _, text in cases]
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for text in texts:
+            classify_text(text)
+    per_call = (time.perf_counter() - started) / (args.rounds * len(texts))
+    print(f"{len(cases)} cases, {per_call * 1e6:.1f} µs per call")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark the multi-process preparation stage of `lu batch`.
+
+Reports how many lines per second language detection, classification and
+prompt building reach as the worker count grows. No requests are sent.
+
+    python benchmarks/bench_prepare.py --lines 50000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import Config
+from app.pipeline import BulkPipeline
+from app.translator import TranslationService
+
+
+SAMPLES = [
+    "apple", "good morning", "The weather is beautiful today.",
+    "artificial intelligence", "Wie geht es dir heute?", "programming",
+    "Je voudrais un café, s'il vous plaît.", "biblioteca", "Доброе утро",
+    "how are you doing", "la casa azul", "Hoe laat is het?",
+]
+
+
+def make_lines(count: int):
+    random.seed(0)
+    return [f"{random.choice(SAMPLES)} {i}" if i % 3 else random.choice(SAMPLES) for i in range(count)]
+
+
+async def measure(translator, lines, workers: int) -> float:
+    pipeline = BulkPipeline(translator, "zh-cn", workers=workers)
+    started = time.perf_counter()
+    async for _ in pipeline.prepared(lines):
+        pass
+    return len(lines) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    translator = TranslationService(Config())
+    lines = make_lines(args.lines)
+    counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < args.max_workers], args.max_workers})
+
+    baseline = None
+    print(f"{'workers':>8} {'lines/s':>12} {'speedup':>8}")
+    for workers in counts:
+        rate = asyncio.run(measure(translator, lines, workers))
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>12.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
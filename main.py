@@ -46,6 +46,8 @@ def main():
                         # trans命令需要解析参数
                         # 这里我们需要手动解析参数
                         target = None
+                        tm_only = False
+                        timings = False
                         text_parts = []
                         
                         i = 0
@@ -57,16 +59,27 @@ def main():
                                     i += 2
                                 else:
                                     i += 1
+                            elif arg == '--tm-only':
+                                tm_only = True
+                                i += 1
+                            elif arg == '--timings':
+                                timings = True
+                                i += 1
                             else:
                                 text_parts.append(arg)
                                 i += 1
                         
                         # 调用trans命令
-                        sub_ctx.params = {'target': target, 'text': text_parts}
+                        sub_ctx.params = {'target': target, 'tm_only': tm_only, 'timings': timings, 'text': text_parts}
                         cmd.invoke(sub_ctx)
                     return
                 except SystemExit:
                     return
+        
+        elif first_arg in cli.commands:
+            # 其他子命令参数较规范，交给click自行解析
+            cli.commands[first_arg].main(args=sys.argv[2:], prog_name=f"lu {first_arg}")
+            return
     
     # 如果不是子命令，正常调用CLI
     cli()
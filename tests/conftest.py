@@ -0,0 +1,36 @@
+import pytest
+
+from app.config import Config
+from app.translator import TranslationService
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Default configuration living in a temporary home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    config = Config()
+    config.set("models.openai.api_key", "test-key")
+    config.set("history.enabled", False)
+    config.set("translation_memory.enabled", False)
+    return config
+
+
+@pytest.fixture
+def translator(config):
+    return TranslationService(config)
+
+
+@pytest.fixture
+def persisting(config):
+    """Translator that saves history, memory and cassettes, with a stubbed OpenAI stream."""
+    config.set("history.enabled", True)
+    config.set("translation_memory.enabled", True)
+    config.set("replay.record", True)
+    translator = TranslationService(config)
+
+    async def fake(prompt, model_config, endpoint=None, usage=None, max_tokens=None):
+        yield "结果"
+
+    # 只替换最底层的请求，_stream_provider 中的录制逻辑照常运行
+    translator._translate_openai = fake
+    return translator
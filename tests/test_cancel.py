@@ -0,0 +1,114 @@
+import asyncio
+import json
+import select
+import socket
+import threading
+import time
+
+import pytest
+
+from app.translator import TranslationService
+
+# 取消后服务端应尽快看到连接关闭；正常情况下不到 1 毫秒
+CLOSE_BOUND = 0.5
+
+
+class MockServer:
+    """Streams SSE chunks until the client disconnects and records when it did."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.closed_at = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _serve(self) -> None:
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                data += conn.recv(65536)
+            head, _, body = data.partition(b"\r\n\r\n")
+            length = int([line.split(b":")[1] for line in head.split(b"\r\n")
+                          if line.lower().startswith(b"content-length")][0])
+            while len(body) < length:
+                body += conn.recv(65536)
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Transfer-Encoding: chunked\r\n\r\n")
+            index = 0
+            while True:
+                event = json.dumps({"id": "x", "object": "chat.completion.chunk", "created": 0, "model": "mock",
+                                    "choices": [{"index": 0, "delta": {"content": f"t{index} "}, "finish_reason": None}]})
+                payload = f"data: {event}\n\n".encode()
+                try:
+                    conn.sendall(b"%x\r\n%s\r\n" % (len(payload), payload))
+                except OSError:
+                    self.closed_at.append(time.perf_counter())
+                    return
+                index += 1
+                # 客户端关闭连接时 socket 变为可读且 recv 返回空
+                readable, _, _ = select.select([conn], [], [], self.interval)
+                if readable and not conn.recv(65536):
+                    self.closed_at.append(time.perf_counter())
+                    return
+
+
+async def cancel_once(translator, server: MockServer, how: str, after_chunks: int) -> float:
+    """Seconds from closing or cancelling the stream until the server saw the disconnect."""
+    stream = translator.translate_streaming("The weather is beautiful today.", "zh-cn", "en")
+    received = 0
+    seen = len(server.closed_at)
+
+    if how == "close":
+        async for _ in stream:
+            received += 1
+            if received >= after_chunks:
+                break
+        started = time.perf_counter()
+        await stream.aclose()
+    else:
+        ready = asyncio.Event()
+
+        async def consume():
+            nonlocal received
+            async for _ in stream:
+                received += 1
+                if received >= after_chunks:
+                    ready.set()
+
+        task = asyncio.create_task(consume())
+        await ready.wait()
+        started = time.perf_counter()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    deadline = time.perf_counter() + 2.0
+    while len(server.closed_at) == seen and time.perf_counter() < deadline:
+        await asyncio.sleep(0.0005)
+    if len(server.closed_at) == seen:
+        return float("inf")
+    return server.closed_at[-1] - started
+
+
+@pytest.fixture(scope="module")
+def server():
+    return MockServer()
+
+
+@pytest.mark.parametrize("how", ["close", "cancel"])
+@pytest.mark.parametrize("provider", ["openai", "custom"])
+def test_cancel_closes_the_connection(config, server, provider, how):
+    config.set("provider", provider)
+    config.set(f"models.{provider}", {"api_key": "mock", "model": "mock", "base_url": server.base_url})
+    translator = TranslationService(config)
+    delays = [asyncio.run(cancel_once(translator, server, how, 3)) for _ in range(3)]
+    assert max(delays) < CLOSE_BOUND
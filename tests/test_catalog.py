@@ -0,0 +1,78 @@
+import pytest
+
+from app.catalog import PoCatalog, mask_placeholders, needs_translation, unmask_placeholders
+from app.packing import build_pack_prompt
+
+
+@pytest.mark.parametrize("text", ["100% complete", "Progress: 50% done", "50% off", "Save 20%!"])
+def test_percent_in_prose_is_not_a_placeholder(text):
+    assert mask_placeholders(text) == (text, [])
+
+
+@pytest.mark.parametrize("text, masked", [
+    ("Hello %s, you have %d new", "Hello ⟦0⟧, you have ⟦1⟧ new"),
+    ("%(count)d files, 100%% done", "⟦0⟧ files, 100⟦1⟧ done"),
+    ("Hi {name}, {0} and {{user}} ${x}", "Hi ⟦0⟧, ⟦1⟧ and ⟦2⟧ ⟦3⟧"),
+    ("<b>{ not a placeholder }</b>", "⟦0⟧{ not a placeholder }⟦1⟧"),
+])
+def test_placeholders_are_masked(text, masked):
+    assert mask_placeholders(text)[0] == masked
+
+
+def test_icu_plural_keeps_case_text_translatable():
+    text = "{count, plural, one {# item} other {# items}}"
+    masked, tokens = mask_placeholders(text)
+    assert masked == "⟦0⟧ item⟦1⟧ items⟦2⟧"
+    assert unmask_placeholders("⟦0⟧ 件⟦1⟧ 件⟦2⟧", tokens) == "{count, plural, one {# 件} other {# 件}}"
+
+
+def test_icu_case_with_nested_placeholder():
+    text = "{n, plural, =0 {no messages} other {# messages from {name}}}"
+    masked, tokens = mask_placeholders(text)
+    assert masked == "⟦0⟧no messages⟦1⟧ messages from ⟦2⟧⟦3⟧"
+    assert unmask_placeholders(masked, tokens) == text
+
+
+def test_needs_translation():
+    assert not needs_translation("%s: %d")
+    assert needs_translation("{count, plural, one {# item} other {# items}}")
+
+
+def test_pack_prompt_asks_to_keep_tokens():
+    assert "⟦0⟧ 的标记" in build_pack_prompt([(0, "Hello ⟦0⟧")], "English", "Japanese", "Chinese")
+    assert "占位符" not in build_pack_prompt([(0, "Hello")], "English", "Japanese", "Chinese")
+
+
+PO = r"""msgid ""
+msgstr ""
+"Language: en\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+
+msgid "%d file"
+msgid_plural "%d files"
+msgstr[0] ""
+msgstr[1] ""
+"""
+
+
+@pytest.mark.parametrize("lang, nplurals", [("ja", 1), ("de", 2), ("ru", 3), ("pl", 3), ("ar", 6)])
+def test_po_plurals_follow_target_language(tmp_path, lang, nplurals):
+    path = tmp_path / "messages.pot"
+    path.write_text(PO, encoding="utf-8")
+    rendered = PoCatalog(path).render({"%d file": "one", "%d files": "many"}, lang)
+    assert f"Language: {lang}" in rendered
+    assert f"Plural-Forms: nplurals={nplurals};" in rendered
+
+    out = tmp_path / "out.po"
+    out.write_text(rendered, encoding="utf-8")
+    fields = PoCatalog(out).entries[1]["fields"]
+    assert sorted(k for k in fields if k.startswith("msgstr[")) == [f"msgstr[{n}]" for n in range(nplurals)]
+    assert fields[f"msgstr[{nplurals - 1}]"] == "many"
+
+
+def test_po_plurals_left_empty_for_unknown_language(tmp_path):
+    path = tmp_path / "messages.pot"
+    path.write_text(PO, encoding="utf-8")
+    rendered = PoCatalog(path).render({"%d file": "one", "%d files": "many"}, "xx")
+    assert "nplurals=2; plural=(n != 1);" in rendered
+    assert "one" not in rendered and "many" not in rendered
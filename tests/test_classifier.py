@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pytest
+
+from app.classifier import classify_text
+
+# 与 benchmarks/bench_classifier.py 共用同一份标注数据，计时仍由基准脚本负责
+CASES_FILE = Path(__file__).resolve().parent.parent / "benchmarks" / "classifier_cases.tsv"
+
+
+def _cases():
+    cases = []
+    with open(CASES_FILE, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip() and not line.startswith("#"):
+                lang, expected, text = line.rstrip("\n").split("\t", 2)
+                cases.append(pytest.param(text, expected, id=f"{number}-{lang}-{expected}"))
+    return cases
+
+
+@pytest.mark.parametrize("text, expected", _cases())
+def test_labelled_case(text, expected):
+    assert classify_text(text) == expected
@@ -0,0 +1,51 @@
+from app.endpoints import EndpointPool
+
+
+MODEL_CONFIG = {
+    "model": "gpt-4o",
+    "api_key": "shared",
+    "base_url": "https://api.example.com/v1",
+    "endpoints": [{"name": "a", "api_key": "key-a", "weight": 2}, {"name": "b", "api_key": "key-b", "model": "fixed"}]
+}
+
+
+def test_switching_models_keeps_endpoint_state(tmp_path):
+    pool = EndpointPool(tmp_path / "endpoint_usage.json")
+    first = pool.endpoints("openai", MODEL_CONFIG)
+    pool.acquire(first[0])
+    pool.release(first[1], error=True, rate_limited=True)
+    first[0]._client = client = object()
+
+    downgraded = pool.endpoints("openai", dict(MODEL_CONFIG, model="gpt-4o-mini"))
+    assert downgraded[0] is first[0] and downgraded[1] is first[1]
+    assert downgraded[0].in_flight == 1
+    assert downgraded[1].penalty > 0 and downgraded[1].cooldown_until > 0
+    assert downgraded[0]._client is client
+    assert "model" not in downgraded[0].config
+
+
+def test_model_is_chosen_per_request(tmp_path):
+    pool = EndpointPool(tmp_path / "endpoint_usage.json")
+    a, b = pool.endpoints("openai", MODEL_CONFIG)
+    request = a.request_config(dict(MODEL_CONFIG, model="gpt-4o-mini"))
+    assert request["model"] == "gpt-4o-mini" and request["api_key"] == "key-a"
+    # 条目里单独配置的模型优先
+    assert b.request_config(MODEL_CONFIG)["model"] == "fixed"
+
+
+def test_weighted_choice(tmp_path):
+    pool = EndpointPool(tmp_path / "endpoint_usage.json")
+    endpoints = pool.endpoints("openai", MODEL_CONFIG)
+    picks = []
+    for _ in range(30):
+        endpoint = pool.choose(endpoints)
+        pool.acquire(endpoint)
+        picks.append(endpoint.name)
+    assert picks.count("a") == 20 and picks.count("b") == 10
+
+
+def test_new_credentials_get_a_new_endpoint(tmp_path):
+    pool = EndpointPool(tmp_path / "endpoint_usage.json")
+    old = pool.endpoints("custom", {"api_key": "one", "base_url": "http://x", "model": "m"})[0]
+    new = pool.endpoints("custom", {"api_key": "two", "base_url": "http://x", "model": "m"})[0]
+    assert old is not new
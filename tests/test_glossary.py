@@ -0,0 +1,37 @@
+import pytest
+
+from app.glossary import Glossary, load_keys, might_match
+
+ENTRIES = [
+    {"term": "cat", "translations": {"zh-cn": "猫"}},
+    {"term": "machine learning", "translations": {"zh-cn": "机器学习"}},
+    {"term": "AI芯片", "translations": {"en": "AI chip"}},
+    {"term": "人工智能", "translations": {"en": "AI"}},
+    {"term": "C++", "translations": {"*": "C++"}},
+]
+
+
+@pytest.mark.parametrize("text", [
+    "a cat", "Machine Learning basics", "新的AI芯片", "关于人工智能", "written in C++", "category", "nothing here",
+    "猫cat", "learning machines",
+])
+def test_prefilter_never_hides_a_match(text):
+    glossary = Glossary(ENTRIES)
+    if glossary.find(text):
+        assert might_match(glossary.keys(), text)
+
+
+def test_prefilter_rejects_unrelated_text():
+    keys = Glossary(ENTRIES).keys()
+    assert not might_match(keys, "The weather is beautiful today.")
+    assert not might_match(keys, "category")
+
+
+def test_automaton_is_loaded_only_when_a_term_may_occur(config, translator):
+    Glossary(ENTRIES).save(config.config_dir)
+    assert load_keys(config.config_dir) == Glossary(ENTRIES).keys()
+
+    assert translator.glossary_section(["The weather is nice"], "zh-cn") == ""
+    assert not translator._glossary_loaded
+    assert "猫" in translator.glossary_section(["a cat"], "zh-cn")
+    assert translator._glossary_loaded
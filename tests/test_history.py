@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from app.history import FTS_SCHEMA, HistoryStore
+
+
+def _store(tmp_path, records):
+    store = HistoryStore(tmp_path / "history.db")
+    for index, (source, target) in enumerate(records):
+        store.add({"input": source, "output": target, "source_lang": "en", "target_lang": "zh-cn",
+                   "created_at": 1000.0 + index})
+    store.close()
+    return store
+
+
+RECORDS = [
+    ("artificial intelligence", "人工智能"),
+    ("The weather is nice", "天气很好"),
+    ("e-mail me", "给我发邮件"),
+    ("AI chips", "人工智能芯片"),
+]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("智能", {"artificial intelligence", "AI chips"}),
+    ("邮", {"e-mail me"}),
+    ("件", {"e-mail me"}),
+    ("ai", {"AI chips", "e-mail me"}),
+    ("he", {"The weather is nice"}),
+    ("e-m", {"e-mail me"}),
+    ("天气 ni", {"The weather is nice"}),
+    ("intelligence", {"artificial intelligence"}),
+    ("zz", set()),
+])
+def test_short_and_long_queries_match_substrings(tmp_path, query, expected):
+    store = _store(tmp_path, RECORDS)
+    assert {r["input"] for r in store.search(query)} == expected
+
+
+def test_filters_apply_after_ranking_window(tmp_path):
+    store = _store(tmp_path, [(f"apple {i}", "苹果") for i in range(100)])
+    results = store.search("apple", since=1090.0, limit=5)
+    assert len(results) == 5 and all(r["created_at"] >= 1090.0 for r in results)
+    assert len(store.search("苹果", since=1095.0, limit=20)) == 5
+
+
+def test_existing_database_gets_the_short_query_index(tmp_path):
+    conn = sqlite3.connect(tmp_path / "history.db")
+    conn.execute(FTS_SCHEMA)
+    conn.execute("CREATE TABLE history (id INTEGER PRIMARY KEY, created_at REAL NOT NULL, source_lang TEXT, "
+                 "target_lang TEXT, provider TEXT, model TEXT, input TEXT NOT NULL, output TEXT NOT NULL)")
+    conn.execute("INSERT INTO history (created_at, input, output) VALUES (1, 'good morning', '早上好')")
+    conn.commit()
+    conn.close()
+    store = HistoryStore(tmp_path / "history.db")
+    assert [r["input"] for r in store.search("早上")] == ["good morning"]
+
+
+def test_deleted_rows_leave_the_short_query_index(tmp_path):
+    store = _store(tmp_path, RECORDS)
+    conn = store._connect()
+    with conn:
+        conn.execute("DELETE FROM history WHERE input = 'AI chips'")
+    conn.close()
+    assert {r["input"] for r in store.search("智能")} == {"artificial intelligence"}
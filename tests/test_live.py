@@ -0,0 +1,51 @@
+import asyncio
+
+from app.i18n import I18n
+from app.live import LiveLookup
+
+
+def _type(session, text):
+    async def run():
+        for ch in text:
+            session.text += ch
+            session._on_change()
+            if session._timer:
+                await asyncio.sleep(0.02)
+            if session._request:
+                await session._request
+        session._save_current()
+
+    asyncio.run(run())
+
+
+def test_only_the_final_text_is_saved(persisting):
+    session = LiveLookup(persisting, I18n("en"), lambda text: "zh-cn", debounce=0.001)
+    _type(session, "hello")
+    persisting.history.close()
+    assert [r["input"] for r in persisting.history.export()] == ["hello"]
+    assert not persisting.cassettes.directory.exists()
+
+
+def test_persisted_translations_are_recorded(persisting):
+    # 对照：同样的替身在 persist=True 时确实会写入录制文件
+    async def run():
+        return [item async for item in persisting.translate_sections("hello", "zh-cn", "en")]
+
+    asyncio.run(run())
+    assert any(persisting.cassettes.directory.iterdir())
+
+
+def test_target_is_kept_while_input_is_short(persisting):
+    targets = iter(["ja", "en", "de", "fr", "ko"] * 10)
+    session = LiveLookup(persisting, I18n("en"), lambda text: next(targets), debounce=0.001, detect_min_chars=4)
+    seen = []
+
+    async def run():
+        for ch in "hello":
+            session.text += ch
+            session._on_change()
+            seen.append(session.target)
+            session._cancel_pending()
+
+    asyncio.run(run())
+    assert seen == ["ja", "ja", "ja", "en", "de"]
@@ -0,0 +1,47 @@
+import asyncio
+
+from app.packing import parse_pack_line
+
+
+def test_parse_pack_line_with_note():
+    expected = {3: "apple"}
+    assert parse_pack_line('{"id": 3, "translation": "苹果", "note": "n."}', expected) == (3, "苹果  (n.)")
+    assert parse_pack_line('{"id": 4, "translation": "梨"}', expected) is None
+    assert parse_pack_line("❌ Error: HTTP 401", expected) is None
+
+
+def test_provider_error_is_returned_for_every_item_without_retry(translator):
+    calls = []
+
+    async def failing(prompt, route=None):
+        calls.append(prompt)
+        yield "❌ Error: HTTP 401"
+
+    translator._stream_provider = failing
+
+    async def run():
+        return dict([item async for item in translator.translate_items(["apple", "pear"], "zh-cn", "en")])
+
+    results = asyncio.run(run())
+    assert results == {0: "❌ Error: HTTP 401", 1: "❌ Error: HTTP 401"}
+    assert len(calls) == 1
+
+
+def test_missing_items_are_retried(translator):
+    calls = []
+
+    async def partial(prompt, route=None):
+        calls.append(prompt)
+        if len(calls) == 1:
+            yield '{"id": 0, "translation": "苹果"}\n'
+        else:
+            yield '{"id": 1, "translation": "梨"}\n'
+
+    translator._stream_provider = partial
+
+    async def run():
+        return dict([item async for item in translator.translate_items(["apple", "pear"], "zh-cn", "en",
+                                                                         notes=False)])
+
+    assert asyncio.run(run()) == {0: "苹果", 1: "梨"}
+    assert len(calls) == 2
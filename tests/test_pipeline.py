@@ -0,0 +1,49 @@
+import asyncio
+
+from app.packing import plan_packs
+from app.pipeline import BulkPipeline, detect_source, prepare_chunk
+
+WORDS = "apple house running beautiful computer water happy window garden yellow".split() * 100
+
+
+def _sources(packs):
+    return [pack["prompt"].split("从 ")[1].split(" 翻译")[0] for pack in packs]
+
+
+def test_single_words_use_the_job_language():
+    source = detect_source(WORDS)
+    packs = prepare_chunk(0, WORDS, source, "zh-cn", "zh-cn", 3000, True)
+    assert source == "en"
+    assert set(_sources(packs)) == {"English"}
+    # 与进程内的 translate_items 打包方式一致
+    assert len(packs) == len(plan_packs(WORDS, 3000))
+
+
+def test_long_lines_in_another_language_get_their_own_pack():
+    lines = WORDS[:20] + ["Je voudrais un café, s'il vous plaît, merci beaucoup."]
+    packs = prepare_chunk(100, lines, "en", "zh-cn", "zh-cn", 3000, True)
+    assert _sources(packs) == ["English", "French"]
+    assert list(packs[1]["expected"]) == [120]
+
+
+def test_missing_items_are_retried_with_the_job_language(translator):
+    calls = []
+
+    async def no_results(expected, prompt, route):
+        return
+        yield
+
+    async def translate_items(items, target_lang, source_lang=None, notes=True):
+        calls.append(source_lang)
+        for index, item in enumerate(items):
+            yield index, item
+
+    translator.stream_pack = no_results
+    translator.translate_items = translate_items
+    pipeline = BulkPipeline(translator, "zh-cn", workers=1, chunk_size=500)
+
+    async def collect():
+        return [item async for item in pipeline.run(WORDS[:50])]
+
+    assert len(asyncio.run(collect())) == 50
+    assert calls == ["en"]
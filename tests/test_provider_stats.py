@@ -0,0 +1,29 @@
+from app.provider_stats import ProviderStats
+
+
+def _stats(tmp_path):
+    return ProviderStats(tmp_path / "provider_stats.json", explore_rate=0.0)
+
+
+def test_failed_first_request_does_not_look_fast(tmp_path):
+    stats = _stats(tmp_path)
+    stats.record("broken", None, True)
+    stats.record("slow", 3.0, False)
+    assert stats.summary()["broken"]["ttft"] is None
+    assert stats.expected_latency("broken") > stats.expected_latency("slow")
+    assert stats.choose(["broken", "slow"]) == "slow"
+
+
+def test_always_failing_provider_is_not_preferred(tmp_path):
+    stats = _stats(tmp_path)
+    for _ in range(10):
+        stats.record("broken", 0.2, True)
+        stats.record("ok", 2.0, False)
+    assert all(stats.choose(["broken", "ok"]) == "ok" for _ in range(20))
+
+
+def test_first_success_replaces_unknown_ttft(tmp_path):
+    stats = _stats(tmp_path)
+    stats.record("openai", None, True)
+    stats.record("openai", 1.5, False)
+    assert ProviderStats(tmp_path / "provider_stats.json").summary()["openai"]["ttft"] == 1.5
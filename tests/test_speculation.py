@@ -0,0 +1,46 @@
+import asyncio
+import importlib
+import time
+
+from app.i18n import I18n
+from app.preferences import TargetPreferences
+
+# app.cli 模块名被同名的 click 命令组遮住
+cli = importlib.import_module("app.cli")
+
+
+def _lookup(translator, config, guess, chosen, monkeypatch):
+    def select(i18n, primary_lang):
+        # 让预先发起的请求先完成
+        time.sleep(0.2)
+        return chosen
+
+    monkeypatch.setattr(cli, "interactive_select_target_language", select)
+    preferences = TargetPreferences(config.config_dir / "target_history.json", "zh-cn")
+    asyncio.run(cli._translate_with_speculation(translator, "你好世界", guess, preferences, I18n("en"), "zh-cn"))
+    translator.history.close()
+    return list(translator.history.export())
+
+
+def test_wrong_guess_is_not_saved(persisting, config, monkeypatch):
+    records = _lookup(persisting, config, "en", "ja", monkeypatch)
+    assert [r["target_lang"] for r in records] == ["ja"]
+    assert persisting.memory.lookup("你好世界", "en") is None
+
+
+def test_right_guess_is_saved_once(persisting, config, monkeypatch):
+    records = _lookup(persisting, config, "en", "en", monkeypatch)
+    assert [(r["target_lang"], r["complete"]) for r in records] == [("en", 1)]
+    assert persisting.memory.lookup("你好世界", "en") is not None
+
+
+def test_persist_false_leaves_result_to_caller(persisting):
+    async def run():
+        return [item async for item in persisting.translate_sections("hello", "zh-cn", "en", persist=False)]
+
+    asyncio.run(run())
+    result = persisting.last_result
+    assert result["record"]["output"] == "结果" and result["record"]["complete"] == 1
+    persisting.history.close()
+    assert list(persisting.history.export()) == []
+    assert not persisting.cassettes.directory.exists()
@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        pass
+
+
+def _chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+@pytest.fixture
+def requests(translator, monkeypatch):
+    sent = []
+
+    async def create(**kwargs):
+        sent.append(kwargs)
+        usage = SimpleNamespace(prompt_tokens=42, completion_tokens=7) if "stream_options" in kwargs else None
+        return FakeStream([_chunk("你好"), _chunk(usage=usage)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(translator, "_openai_client", lambda model_config: client)
+    return sent
+
+
+def _translate(translator):
+    async def run():
+        return "".join([chunk async for chunk in translator.translate_streaming("hello", "zh-cn", "en")])
+
+    return asyncio.run(run())
+
+
+def _usage_rows(translator):
+    return translator.usage._connect().execute(
+        "SELECT prompt_tokens, completion_tokens, estimated FROM usage").fetchall()
+
+
+def test_official_api_reports_usage(translator, requests):
+    assert _translate(translator) == "你好"
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert [tuple(row) for row in _usage_rows(translator)] == [(42, 7, 0)]
+
+
+def test_compatible_server_gets_no_stream_options(config, translator, requests):
+    config.set("models.openai.base_url", "http://localhost:8000/v1")
+    assert _translate(translator) == "你好"
+    assert "stream_options" not in requests[0]
+    assert [row["estimated"] for row in _usage_rows(translator)] == [1]
+
+
+def test_stream_usage_setting_wins(config, translator, requests):
+    config.set("models.openai.base_url", "http://localhost:8000/v1")
+    config.set("models.openai.stream_usage", True)
+    _translate(translator)
+    assert "stream_options" in requests[0]
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.watch import Checkpoint, WatchSession
+
+
+class FakeTranslator:
+    """Upper-cases lines; fails on "bad" always and on "flaky" the first ``flaky`` times."""
+
+    def __init__(self, flaky: int = 0):
+        self.flaky = flaky
+        self.requested = []
+
+    async def translate_items(self, items, target_lang, notes=True):
+        self.requested.extend(items)
+        for index, item in enumerate(items):
+            if item == "bad" or (item == "flaky" and self.flaky > 0):
+                if item == "flaky":
+                    self.flaky -= 1
+                yield index, "❌ Error: HTTP 500"
+            else:
+                yield index, item.upper()
+
+
+def _watch(tmp_path, text, translator=None):
+    source = tmp_path / "input.log"
+    if text is not None:
+        source.write_text(text, encoding="utf-8")
+    checkpoint = Checkpoint(tmp_path / "watch", source)
+    translator = translator or FakeTranslator()
+    emitted, failed = [], []
+    session = WatchSession(translator, "en", lambda line, t: emitted.append(t),
+                           on_error=lambda line, error: failed.append(line),
+                           path=source, checkpoint=checkpoint, window=0.01, from_start=True, poll_interval=0.01,
+                           retry_delay=0.01)
+
+    async def run():
+        task = asyncio.create_task(session.run())
+        await asyncio.sleep(0.3)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    offset = checkpoint.load()
+    return emitted, failed, offset, checkpoint.failed
+
+
+def test_checkpoint_advances_past_translated_lines(tmp_path):
+    emitted, failed, offset, failed_spans = _watch(tmp_path, "one\ntwo\n")
+    assert emitted == ["ONE", "TWO"] and failed == []
+    assert offset == len("one\ntwo\n") and failed_spans == []
+
+
+def test_transient_errors_are_retried_in_session(tmp_path):
+    emitted, failed, offset, failed_spans = _watch(tmp_path, "one\nflaky\n", FakeTranslator(flaky=2))
+    assert emitted == ["ONE", "FLAKY"] and failed == []
+    assert failed_spans == []
+
+
+def test_failed_lines_do_not_stop_the_checkpoint(tmp_path):
+    emitted, failed, offset, failed_spans = _watch(tmp_path, "one\nbad\nthree\n")
+    assert emitted == ["ONE", "THREE"]
+    assert failed == ["bad"]
+    assert offset == len("one\nbad\nthree\n")
+    assert failed_spans == [(4, 8)]
+
+    # 重启后只重新翻译失败的行，之前已输出的行不再翻译
+    (tmp_path / "input.log").write_text("one\nbad\nthree\n", encoding="utf-8")
+    translator = FakeTranslator()
+    _watch(tmp_path, None, translator)
+    assert set(translator.requested) == {"bad"}